@@ -1,5 +1,13 @@
 from .admin import Admin
 from .livro import Livro
 from .doacao import Doacao
+from .doacao_arquivada import DoacaoArquivada
+from .fila_email import FilaEmail
+from .token_revogado import TokenRevogado
+from .resumo import ResumoDoacoesDia, ResumoDoadoresDia
+from .resposta_idempotente import RespostaIdempotente
+from app.utils.search import registrar_ddl_busca
 
-__all__ = ['Admin', 'Livro', 'Doacao']
\ No newline at end of file
+registrar_ddl_busca(Livro.__table__, Doacao.__table__, DoacaoArquivada.__table__)
+
+__all__ = ['Admin', 'Livro', 'Doacao', 'DoacaoArquivada', 'FilaEmail', 'TokenRevogado', 'ResumoDoacoesDia', 'ResumoDoadoresDia', 'RespostaIdempotente']
\ No newline at end of file
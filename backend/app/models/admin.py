@@ -1,3 +1,4 @@
+from flask import current_app
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
@@ -11,7 +12,8 @@ class Admin(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        metodo = current_app.config.get('PASSWORD_HASH_METHOD') or 'pbkdf2'
+        self.password_hash = generate_password_hash(password, method=metodo)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -3,6 +3,14 @@ from datetime import datetime
 
 class Doacao(db.Model):
     __tablename__ = 'doacoes'
+    __table_args__ = (
+        # Suporta a paginação por cursor ordenada por (created_at DESC, id DESC)
+        db.Index('ix_doacoes_created_at_id', 'created_at', 'id'),
+        # Contagem de doações por livro (delete_livro) e join do expand=livro
+        db.Index('ix_doacoes_livro_id', 'livro_id'),
+        # No SQLite, não reutiliza ids de doações movidas para doacoes_arquivadas
+        {'sqlite_autoincrement': True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(255), nullable=False)
@@ -14,6 +22,11 @@ class Doacao(db.Model):
 
     livro = db.relationship('Livro', backref='doacoes')
 
+    @classmethod
+    def colunas_dict(cls):
+        """Colunas de to_dict(), para listar com with_entities sem instanciar objetos ORM"""
+        return (cls.id, cls.nome, cls.email, cls.tipo, cls.item, cls.livro_id, cls.created_at)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -0,0 +1,56 @@
+from app import db
+from datetime import datetime
+
+class DoacaoArquivada(db.Model):
+    """Doações antigas (flask doacoes archive) ou excluídas, fora da tabela quente.
+
+    Mantém o id original; `excluida_em` marca as doações excluídas pelo painel,
+    que não aparecem no histórico.
+    """
+    __tablename__ = 'doacoes_arquivadas'
+    __table_args__ = (
+        db.Index('ix_doacoes_arquivadas_created_at_id', 'created_at', 'id'),
+        db.Index('ix_doacoes_arquivadas_livro_id', 'livro_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    nome = db.Column(db.String(255), nullable=False)
+    email = db.Column(db.String(255), nullable=False)
+    tipo = db.Column(db.String(10), nullable=False)
+    item = db.Column(db.String(500), nullable=False)
+    livro_id = db.Column(db.Integer, nullable=True)  # Sem FK: o histórico sobrevive ao livro
+    created_at = db.Column(db.DateTime)
+    arquivada_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    excluida_em = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'email': self.email,
+            'tipo': self.tipo,
+            'item': self.item,
+            'livro_id': self.livro_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    @classmethod
+    def colunas_dict(cls):
+        """Mesmas colunas de Doacao.colunas_dict(), para listar o histórico junto"""
+        return (cls.id, cls.nome, cls.email, cls.tipo, cls.item, cls.livro_id, cls.created_at)
+
+    @classmethod
+    def de_doacao(cls, doacao, excluida=False):
+        """Cópia arquivada de uma doação (marcada como excluída se `excluida`)"""
+        agora = datetime.utcnow()
+        return cls(
+            id=doacao.id,
+            nome=doacao.nome,
+            email=doacao.email,
+            tipo=doacao.tipo,
+            item=doacao.item,
+            livro_id=doacao.livro_id,
+            created_at=doacao.created_at,
+            arquivada_em=agora,
+            excluida_em=agora if excluida else None
+        )
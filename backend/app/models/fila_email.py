@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+
+class FilaEmail(db.Model):
+    __tablename__ = 'fila_emails'
+    __table_args__ = (
+        # Consulta do worker: pendentes cuja próxima tentativa já venceu
+        db.Index('ix_fila_emails_status_proxima', 'status', 'proxima_tentativa_em'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    destinatario = db.Column(db.String(255), nullable=False)
+    assunto = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pendente')  # 'pendente', 'enviando' (reservado por um worker), 'enviado' ou 'falhou'
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    proxima_tentativa_em = db.Column(db.DateTime, default=datetime.utcnow)
+    enviado_em = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'destinatario': self.destinatario,
+            'assunto': self.assunto,
+            'status': self.status,
+            'tentativas': self.tentativas,
+            'ultimo_erro': self.ultimo_erro,
+            'proxima_tentativa_em': self.proxima_tentativa_em.isoformat() if self.proxima_tentativa_em else None,
+            'enviado_em': self.enviado_em.isoformat() if self.enviado_em else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
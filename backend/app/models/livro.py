@@ -3,6 +3,14 @@ from datetime import datetime
 
 class Livro(db.Model):
     __tablename__ = 'livros'
+    __table_args__ = (
+        # Suporta a paginação por cursor ordenada por (titulo, id)
+        db.Index('ix_livros_titulo_id', 'titulo', 'id'),
+        # Garante um único livro por (titulo, autor); alvo do ON CONFLICT na importação
+        db.Index('uq_livros_titulo_autor', 'titulo', 'autor', unique=True),
+        # max(catalogado_em) é a versão do índice de sugestões (app/utils/sugestoes.py)
+        db.Index('ix_livros_catalogado_em', 'catalogado_em'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(255), nullable=False)
@@ -10,7 +18,66 @@ class Livro(db.Model):
     quantidade = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Última mudança de título/autor: baixas de estoque e doações não alteram
+    catalogado_em = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @classmethod
+    def reservar_exemplar(cls, livro_id):
+        """Decrementa o estoque em um único UPDATE condicional.
+
+        Retorna a nova quantidade, ou None se o livro não existe ou está esgotado.
+        As baixas de estoque levam apenas_estoque: não invalidam o snapshot do catálogo
+        (app/utils/snapshot.py), o estoque chega aos clientes pelo SSE.
+        """
+        stmt = (
+            db.update(cls)
+            .where(cls.id == livro_id, cls.quantidade > 0)
+            .values(quantidade=cls.quantidade - 1, updated_at=datetime.utcnow())
+            .returning(cls.quantidade)
+            .execution_options(synchronize_session=False, apenas_estoque=True)
+        )
+        return db.session.execute(stmt).scalar()
+    
+    @classmethod
+    def devolver_exemplar(cls, livro_id):
+        """Incrementa o estoque de forma atômica; retorna a nova quantidade ou None"""
+        stmt = (
+            db.update(cls)
+            .where(cls.id == livro_id)
+            .values(quantidade=cls.quantidade + 1, updated_at=datetime.utcnow())
+            .returning(cls.quantidade)
+            .execution_options(synchronize_session=False, apenas_estoque=True)
+        )
+        return db.session.execute(stmt).scalar()
+    
+    @classmethod
+    def reservar_exemplares(cls, quantidades):
+        """Reserva vários livros de uma vez: {livro_id: exemplares}.
+
+        As linhas são travadas em ordem de id (evita deadlock entre lotes concorrentes)
+        e decrementadas em um único UPDATE condicional. Retorna o conjunto de ids
+        reservados; se faltar algum, quem chama deve desfazer a transação.
+        """
+        ids = sorted(quantidades)
+        db.session.execute(
+            db.select(cls.id).where(cls.id.in_(ids)).order_by(cls.id).with_for_update()
+        ).all()
+
+        pedido = db.case(quantidades, value=cls.id)
+        stmt = (
+            db.update(cls)
+            .where(cls.id.in_(ids), cls.quantidade >= pedido)
+            .values(quantidade=cls.quantidade - pedido, updated_at=datetime.utcnow())
+            .returning(cls.id)
+            .execution_options(synchronize_session=False, apenas_estoque=True)
+        )
+        return set(db.session.execute(stmt).scalars())
+    
+    @classmethod
+    def colunas_dict(cls):
+        """Colunas de to_dict(), para listar com with_entities sem instanciar objetos ORM"""
+        return (cls.id, cls.titulo, cls.autor, cls.quantidade, cls.created_at, cls.updated_at)
+
     def to_dict(self):
         return {
             'id': self.id,
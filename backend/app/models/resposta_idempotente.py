@@ -0,0 +1,14 @@
+from app import db
+from datetime import datetime
+
+class RespostaIdempotente(db.Model):
+    """Resposta guardada de uma requisição com Idempotency-Key (reenviada nas repetições)"""
+    __tablename__ = 'respostas_idempotentes'
+
+    chave = db.Column(db.String(255), primary_key=True)
+    rota = db.Column(db.String(100), primary_key=True)  # A mesma chave pode ser usada em rotas diferentes
+    hash_requisicao = db.Column(db.String(64), nullable=False)  # SHA-256 do corpo: detecta chave reutilizada com outro pedido
+    status = db.Column(db.Integer, nullable=True)  # None enquanto a primeira execução está em andamento
+    corpo = db.Column(db.Text, nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # Base do TTL
@@ -0,0 +1,19 @@
+from app import db
+
+class ResumoDoacoesDia(db.Model):
+    """Total de doações por dia, tipo e livro (livro_id 0 = sem livro)"""
+    __tablename__ = 'resumo_doacoes_dia'
+
+    dia = db.Column(db.Date, primary_key=True)
+    tipo = db.Column(db.String(10), primary_key=True)
+    livro_id = db.Column(db.Integer, primary_key=True, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+class ResumoDoadoresDia(db.Model):
+    """Total de doações por dia e doador (email)"""
+    __tablename__ = 'resumo_doadores_dia'
+
+    dia = db.Column(db.Date, primary_key=True)
+    email = db.Column(db.String(255), primary_key=True)
+    nome = db.Column(db.String(255), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
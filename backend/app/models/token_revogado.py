@@ -0,0 +1,10 @@
+from app import db
+from datetime import datetime
+
+class TokenRevogado(db.Model):
+    __tablename__ = 'tokens_revogados'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False, index=True)
+    expira_em = db.Column(db.DateTime, nullable=False, index=True)  # Depois disso o token já é inválido e a linha pode sair
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,9 +1,41 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from app.models import Admin
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
+from collections import namedtuple
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime
+from app import db, jwt
+from app.models import Admin, TokenRevogado
+from app.utils.cache import admins_cache, tokens_revogados_cache
+from app.utils.rate_limit import limitar
+from app.utils.senhas import HashIndisponivel, gerar_hash, precisa_rehash, verificar_credenciais
 
 auth_bp = Blueprint('auth', __name__)
 
+# Dados do admin mantidos em cache (objetos ORM não podem ser reaproveitados entre sessões)
+AdminIdentidade = namedtuple('AdminIdentidade', ['id', 'username'])
+
+@jwt.user_lookup_loader
+def carregar_admin(jwt_header, jwt_data):
+    """Confirma que o admin do token ainda existe, consultando o banco só em cache miss"""
+    username = jwt_data['sub']
+    identidade = admins_cache.get(username)
+    if identidade is None:
+        admin = Admin.query.filter_by(username=username).first()
+        if admin is None:
+            return None
+        identidade = AdminIdentidade(admin.id, admin.username)
+        admins_cache.set(username, identidade, ttl=current_app.config['JWT_CACHE_TTL'])
+    return identidade
+
+@jwt.token_in_blocklist_loader
+def token_revogado(jwt_header, jwt_data):
+    jti = jwt_data['jti']
+    revogado = tokens_revogados_cache.get(jti)
+    if revogado is None:
+        revogado = db.session.query(TokenRevogado.id).filter_by(jti=jti).first() is not None
+        tokens_revogados_cache.set(jti, revogado, ttl=current_app.config['JWT_CACHE_TTL'])
+    return revogado
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     try:
@@ -14,9 +46,34 @@ def login():
         if not username or not password:
             return jsonify({'error': 'Username e password são obrigatórios'}), 400
 
+        # Limite de tentativas por IP e por usuário (token bucket)
+        config = current_app.config
+        retry_after = (
+            limitar(f'login:ip:{request.remote_addr}', config['LOGIN_RATE_LIMIT_IP'])
+            or limitar(f'login:user:{username}', config['LOGIN_RATE_LIMIT_USER'])
+        )
+        if retry_after:
+            return jsonify({'error': 'Muitas tentativas de login. Tente novamente mais tarde.'}), 429, {
+                'Retry-After': str(retry_after)
+            }
+
         admin = Admin.query.filter_by(username=username).first()
 
-        if admin and admin.check_password(password):
+        try:
+            valido = admin is not None and verificar_credenciais(admin, password)
+        except (HashIndisponivel, FuturesTimeoutError):
+            return jsonify({'error': 'Serviço de login ocupado. Tente novamente.'}), 503, {'Retry-After': '1'}
+
+        if valido:
+            # Atualiza o hash para o algoritmo/custo configurado (no executor limitado;
+            # com ele ocupado, fica para o próximo login)
+            if precisa_rehash(admin.password_hash):
+                try:
+                    admin.password_hash = gerar_hash(password)
+                    db.session.commit()
+                except (HashIndisponivel, FuturesTimeoutError):
+                    pass
+
             token = create_access_token(identity=admin.username)
             return jsonify({
                 'success': True,
@@ -32,6 +89,30 @@ def login():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    try:
+        claims = get_jwt()
+        agora = datetime.utcnow()
+
+        db.session.add(TokenRevogado(jti=claims['jti'], expira_em=datetime.utcfromtimestamp(claims['exp'])))
+        # Tokens já expirados não precisam mais ficar na lista de revogação
+        TokenRevogado.query.filter(TokenRevogado.expira_em < agora).delete(synchronize_session=False)
+        db.session.commit()
+
+        # Revogado é definitivo: pode ficar em cache até o token expirar
+        tokens_revogados_cache.set(claims['jti'], True, ttl=max(1, claims['exp'] - agora.timestamp()))
+
+        return jsonify({
+            'success': True,
+            'message': 'Logout realizado com sucesso'
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/verify', methods=['GET'])
 @jwt_required()
 def verify_token():
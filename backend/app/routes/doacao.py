@@ -1,81 +1,248 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required
-from app import db, mail # <--- IMPORTANTE: Importe 'mail' aqui!
-from app.models import Doacao, Livro
-from app.utils.validators import validar_email
+from app import db
+from app.models import Doacao, DoacaoArquivada, Livro
+from app.utils.validators import validar_email, parse_periodo
+from app.utils.pagination import CursorInvalido, cortar_pagina, decode_cursor, parse_limit
+from app.utils.search import aplicar_busca
+from app.utils.cache import limpar_estatisticas
+from app.utils.resumos import atualizar_resumos
+from app.utils.replica import usar_replica
+from app.utils.email_queue import email_worker, enfileirar_email
+from app.utils.eventos import marcar_livros_alterados
+from app.utils.idempotencia import guardar_resposta, idempotente, nao_guardar
 from datetime import datetime
-from flask_mail import Message # <--- IMPORTANTE: Importe 'Message' aqui!
-from threading import Thread # <--- IMPORTANTE: Importe 'Thread' para envio assíncrono
+from itertools import chain, islice
+import csv
+import heapq
+import io
+import json
 
 doacoes_bp = Blueprint('doacoes', __name__)
 
-# Função auxiliar para enviar email em segundo plano
-def send_async_email(app, msg):
-    with app.app_context():
-        try:
-            mail.send(msg)
-        except Exception as e:
-            print(f"Erro ao enviar email no thread assíncrono: {e}")
-
-# Função principal para enviar email de agradecimento
-def send_thank_you_email(recipient_email, item_donated):
-    try:
-        # Acessa a configuração padrão do remetente a partir da aplicação atual
-        default_sender = current_app.config.get('MAIL_DEFAULT_SENDER')
-
-        msg = Message(
-            subject="Obrigado(a) pela sua doação à Biblioteca Municipal!",
-            sender=default_sender, # Define o remetente
-            recipients=[recipient_email],
-            html=f"""
+# Enfileira o email de agradecimento na mesma transação da doação;
+# o envio fica com o worker da fila (app/utils/email_queue.py)
+# Aceita vários itens para agradecer uma doação em lote com um único email
+def send_thank_you_email(recipient_email, *items_donated):
+    itens = [f'<b>"{item}"</b>' for item in items_donated]
+    descricao = itens[0] if len(itens) == 1 else ', '.join(itens[:-1]) + ' e ' + itens[-1]
+    return enfileirar_email(
+        recipient_email,
+        "Obrigado(a) pela sua doação à Biblioteca Municipal!",
+        f"""
             <p>Olá,</p>
-            <p>A Biblioteca Municipal de Santa Rita do Sapucaí agradece imensamente a sua doação de <b>"{item_donated}"</b>!</p>
+            <p>A Biblioteca Municipal de Santa Rita do Sapucaí agradece imensamente a sua doação de {descricao}!</p>
             <p>Sua contribuição é muito importante para enriquecer nosso acervo e ajudar a comunidade.</p>
             <p>Atenciosamente,</p>
             <p>Equipe da Biblioteca Municipal</p>
             <br>
             <p style="font-size: 0.8em; color: #777;">Este é um email automático, por favor não responda.</p>
             """
-        )
-        # Enviar email em um thread separado para não bloquear a requisição HTTP
-        Thread(target=send_async_email, args=(current_app._get_current_object(), msg)).start()
-        print(f"Email de agradecimento acionado para {recipient_email} sobre {item_donated}")
-    except Exception as e:
-        print(f"Erro ao preparar/acionar envio de email para {recipient_email}: {e}")
+    )
+
+def filtrar_doacoes(query, args, model=Doacao):
+    """Aplica os filtros 'search', 'tipo', 'de' e 'ate' da query string.
+
+    Retorna a query filtrada e a ordenação por relevância da busca (ou None).
+    """
+    search = args.get('search', '')
+    tipo = args.get('tipo', '')
+    inicio, fim = parse_periodo(args.get('de'), args.get('ate'))
+    relevancia = None
+
+    if search:
+        query, relevancia = aplicar_busca(query, model, search)
+
+    if tipo:
+        query = query.filter(model.tipo == tipo)
+
+    if inicio:
+        query = query.filter(model.created_at >= inicio)
+
+    if fim:
+        query = query.filter(model.created_at < fim)
+
+    return query, relevancia
+
+def incluir_arquivadas(args):
+    return args.get('include_archived', '').lower() in ('1', 'true')
+
+def expandir_livro(args):
+    return 'livro' in args.get('expand', '').split(',')
+
+# Campos do livro incluídos com expand=livro (lidos no mesmo SELECT, via LEFT JOIN)
+CAMPOS_LIVRO_EXPANDIDO = ('titulo', 'autor', 'quantidade')
+
+def doacao_dict(linha):
+    """Dict de uma linha de consultas_doacoes; com expand=livro, agrupa as colunas do livro em 'livro'"""
+    dados = linha._asdict()
+    if 'livro_titulo' in dados:
+        livro = {campo: dados.pop(f'livro_{campo}') for campo in CAMPOS_LIVRO_EXPANDIDO}
+        # Doações de jogo, ou arquivadas de um livro já excluído, ficam com livro = None
+        dados['livro'] = {'id': dados['livro_id'], **livro} if livro['titulo'] is not None else None
+    return dados
+
+def consultas_doacoes(args):
+    """Consultas filtradas (colunas do to_dict) da tabela quente e, com
+    'include_archived', também do arquivo (sem as doações excluídas).
+    Com 'expand=livro', cada consulta traz também as colunas do livro.
+
+    Retorna uma lista de (model, query, relevância); ValueError se alguma data for inválida.
+    """
+    modelos = [Doacao, DoacaoArquivada] if incluir_arquivadas(args) else [Doacao]
+    consultas = []
+    for model in modelos:
+        query = model.query
+        if model is DoacaoArquivada:
+            query = query.filter(DoacaoArquivada.excluida_em.is_(None))
+        query, relevancia = filtrar_doacoes(query, args, model)
+
+        # Lê só as colunas do to_dict(); o provider JSON serializa as datas
+        colunas = model.colunas_dict()
+        if len(modelos) > 1:
+            colunas += (db.literal(model is DoacaoArquivada).label('arquivada'),)
+        query = query.with_entities(*colunas)
+        if expandir_livro(args):
+            # Um JOIN em vez de carregar doacao.livro linha a linha (N+1)
+            query = query.outerjoin(Livro, Livro.id == model.livro_id).add_columns(
+                *[getattr(Livro, campo).label(f'livro_{campo}') for campo in CAMPOS_LIVRO_EXPANDIDO]
+            )
+        consultas.append((model, query, relevancia))
+    return consultas
+
+def chave_doacao(doacao):
+    return (doacao.created_at, doacao.id)
 
 # ROTA GET QUE ESTAVA FALTANDO
 @doacoes_bp.route('', methods=['GET'])
 @jwt_required()
+@usar_replica
 def get_doacoes():
     try:
-        search = request.args.get('search', '')
-        tipo = request.args.get('tipo', '')
-
-        query = Doacao.query
-
-        if search:
-            query = query.filter(
-                db.or_(
-                    Doacao.nome.ilike(f'%{search}%'),
-                    Doacao.email.ilike(f'%{search}%'),
-                    Doacao.item.ilike(f'%{search}%')
-                )
-            )
-
-        if tipo:
-            query = query.filter(Doacao.tipo == tipo)
-
-        doacoes = query.order_by(Doacao.created_at.desc()).all()
+        try:
+            consultas = consultas_doacoes(request.args)
+        except ValueError:
+            return jsonify({'error': 'Data inválida'}), 400
+
+        # Paginação por cursor (keyset) quando o cliente pede 'limit' ou 'cursor'
+        if 'limit' in request.args or 'cursor' in request.args:
+            limite = parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            if cursor:
+                created_at, doacao_id = decode_cursor(cursor, datetime, int)
+
+            # Uma página de cada tabela, intercaladas por (created_at, id)
+            paginas = []
+            for model, query, _ in consultas:
+                if cursor:
+                    query = query.filter(
+                        db.or_(
+                            model.created_at < created_at,
+                            db.and_(model.created_at == created_at, model.id < doacao_id)
+                        )
+                    )
+                query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limite + 1)
+                paginas.append(query.all())
+
+            itens = list(islice(heapq.merge(*paginas, key=chave_doacao, reverse=True), limite + 1))
+            doacoes, next_cursor = cortar_pagina(itens, limite, chave_doacao)
+
+            return jsonify({
+                'success': True,
+                'doacoes': [doacao_dict(doacao) for doacao in doacoes],
+                'next_cursor': next_cursor
+            })
+
+        resultados = []
+        for model, query, relevancia in consultas:
+            # Sem paginação, a busca textual ordena os resultados por relevância
+            ordem = (model.created_at.desc(), model.id.desc())
+            if relevancia is not None:
+                ordem = (relevancia,) + ordem
+            resultados.append(query.order_by(*ordem).all())
+
+        if any(relevancia is not None for _, _, relevancia in consultas):
+            # A relevância não é comparável entre tabelas: as arquivadas vêm depois
+            doacoes = list(chain(*resultados))
+        else:
+            doacoes = list(heapq.merge(*resultados, key=chave_doacao, reverse=True))
 
         return jsonify({
             'success': True,
-            'doacoes': [doacao.to_dict() for doacao in doacoes]
+            'doacoes': [doacao_dict(doacao) for doacao in doacoes]
         })
 
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+EXPORT_COLUNAS = ['id', 'nome', 'email', 'tipo', 'item', 'livro_id', 'created_at']
+EXPORT_LOTE = 1000
+
+@doacoes_bp.route('/export', methods=['GET'])
+@jwt_required()
+@usar_replica
+def export_doacoes():
+    formato = request.args.get('formato', 'csv').lower()
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Formato deve ser "csv" ou "ndjson"'}), 400
+
+    try:
+        consultas = consultas_doacoes(request.args)
+    except ValueError:
+        return jsonify({'error': 'Data inválida'}), 400
+
+    colunas = EXPORT_COLUNAS + (['arquivada'] if incluir_arquivadas(request.args) else [])
+    if expandir_livro(request.args):
+        colunas += [f'livro_{campo}' for campo in CAMPOS_LIVRO_EXPANDIDO]
+
+    # Lê direto as colunas (sem instanciar objetos ORM) com cursor do lado do servidor;
+    # com o arquivo, os dois cursores são intercalados por (created_at, id)
+    linhas = heapq.merge(*[
+        query.order_by(model.created_at.desc(), model.id.desc()).yield_per(EXPORT_LOTE)
+        for model, query, _ in consultas
+    ], key=chave_doacao, reverse=True)
+
+    def gerar_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(colunas)
+        for i, linha in enumerate(linhas, 1):
+            writer.writerow([v.isoformat() if isinstance(v, datetime) else v for v in linha])
+            if i % EXPORT_LOTE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def gerar_ndjson():
+        partes = []
+        for i, linha in enumerate(linhas, 1):
+            registro = {
+                col: v.isoformat() if isinstance(v, datetime) else v
+                for col, v in zip(colunas, linha)
+            }
+            partes.append(json.dumps(registro, ensure_ascii=False))
+            if i % EXPORT_LOTE == 0:
+                yield '\n'.join(partes) + '\n'
+                partes = []
+        if partes:
+            yield '\n'.join(partes) + '\n'
+
+    if formato == 'csv':
+        gerador, mimetype = gerar_csv, 'text/csv'
+    else:
+        gerador, mimetype = gerar_ndjson, 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(gerador()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=doacoes.{formato}'}
+    )
+
 @doacoes_bp.route('', methods=['POST'])
+@idempotente
 def create_doacao():
     try:
         data = request.get_json()
@@ -105,16 +272,13 @@ def create_doacao():
             if not livro_id:
                 return jsonify({'error': 'ID do livro é obrigatório para doação de livro'}), 400
 
-            livro = Livro.query.get(livro_id)
-            if not livro:
-                return jsonify({'error': 'Livro não encontrado'}), 404
-
-            if livro.quantidade <= 0:
-                return jsonify({'error': 'Livro não está disponível'}), 400
-
-            # Reduzir quantidade do livro
-            livro.quantidade -= 1
-            livro.updated_at = datetime.utcnow()
+            # Reduzir quantidade do livro com um UPDATE condicional, sem ler antes
+            if Livro.reservar_exemplar(livro_id) is None:
+                db.session.rollback()
+                if db.session.get(Livro, livro_id) is None:
+                    return jsonify({'error': 'Livro não encontrado'}), 404
+                return nao_guardar((jsonify({'error': 'Livro não está disponível'}), 400))
+            marcar_livros_alterados(livro_id)
 
         doacao = Doacao(
             nome=nome,
@@ -125,30 +289,142 @@ def create_doacao():
         )
 
         db.session.add(doacao)
-        db.session.commit()
+        atualizar_resumos([doacao])
 
-        # --- AQUI: Chamar a função de envio de email após o commit da doação ---
-        # Certifique-se de que item_donated é o que você quer que apareça no email.
+        # O email entra na fila na mesma transação da doação.
         # Para jogos, 'item' já deve ser algo como 'Jogo de tabuleiro'.
         # Para livros, 'item' já deve ser 'Titulo - Autor'.
         send_thank_you_email(email, item)
-        # --- Fim da chamada de email ---
+        db.session.flush()  # Gera o id da doação para a resposta
 
-        return jsonify({
+        resposta = jsonify({
             'success': True,
             'doacao': doacao.to_dict(),
             'message': 'Doação registrada com sucesso!'
         }), 201
+        # Com Idempotency-Key, a resposta é guardada no mesmo commit da doação
+        guardar_resposta(resposta)
+
+        db.session.commit()
+        limpar_estatisticas()
+        email_worker.notificar(current_app._get_current_object())
+
+        return resposta
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@doacoes_bp.route('/batch', methods=['POST'])
+@idempotente
+def create_doacoes_batch():
+    try:
+        data = request.get_json() or {}
+
+        nome = data.get('nome', '').strip()
+        email = data.get('email', '').strip()
+        lgpd_consent = data.get('lgpdConsent', False)
+        itens = data.get('itens')
+
+        # Validações do doador
+        if not nome or not email:
+            return jsonify({'error': 'Nome e email são obrigatórios'}), 400
+
+        if not lgpd_consent:
+            return jsonify({'error': 'É necessário aceitar os termos da LGPD'}), 400
+
+        if not validar_email(email):
+            return jsonify({'error': 'Email inválido'}), 400
+
+        if not isinstance(itens, list) or not itens:
+            return jsonify({'error': 'Informe ao menos um item em "itens"'}), 400
+
+        limite = current_app.config['DOACAO_BATCH_MAX']
+        if len(itens) > limite:
+            return jsonify({'error': f'Máximo de {limite} itens por lote'}), 400
+
+        # Validações de cada item, antes de tocar no banco
+        linhas = []
+        quantidades = {}
+        for indice, dados_item in enumerate(itens):
+            if not isinstance(dados_item, dict):
+                return jsonify({'error': 'Item inválido', 'indice': indice}), 400
+
+            tipo = str(dados_item.get('tipo', '')).lower()
+            item = str(dados_item.get('item', '')).strip()
+            livro_id = dados_item.get('livro_id')
+
+            if not tipo or not item:
+                return jsonify({'error': 'Tipo e item são obrigatórios', 'indice': indice}), 400
+
+            if tipo not in ['livro', 'jogo']:
+                return jsonify({'error': 'Tipo deve ser "livro" ou "jogo"', 'indice': indice}), 400
+
+            if tipo == 'livro':
+                if not isinstance(livro_id, int) or isinstance(livro_id, bool):
+                    return jsonify({'error': 'ID do livro é obrigatório para doação de livro', 'indice': indice}), 400
+                quantidades[livro_id] = quantidades.get(livro_id, 0) + 1
+            else:
+                livro_id = None
+
+            linhas.append({'nome': nome, 'email': email, 'tipo': tipo, 'item': item, 'livro_id': livro_id})
+
+        # Reserva todo o estoque de uma vez; se faltar algum livro, nada é gravado
+        if quantidades:
+            reservados = Livro.reservar_exemplares(quantidades)
+            if len(reservados) < len(quantidades):
+                db.session.rollback()
+                faltando = sorted(set(quantidades) - reservados)
+                existentes = {
+                    livro_id for (livro_id,) in
+                    db.session.query(Livro.id).filter(Livro.id.in_(faltando))
+                }
+                nao_encontrados = [livro_id for livro_id in faltando if livro_id not in existentes]
+                if nao_encontrados:
+                    return jsonify({'error': 'Livro não encontrado', 'livros': nao_encontrados}), 404
+                return nao_guardar((jsonify({'error': 'Livro não está disponível', 'livros': faltando}), 400))
+            marcar_livros_alterados(*quantidades)
+
+        # Um único INSERT para todas as doações (executemany com RETURNING)
+        doacoes = db.session.scalars(db.insert(Doacao).returning(Doacao), linhas).all()
+        # Serializa antes do commit para não recarregar cada doação depois dele
+        doacoes_dict = [doacao.to_dict() for doacao in doacoes]
+        atualizar_resumos(doacoes)
+
+        send_thank_you_email(email, *[linha['item'] for linha in linhas])
+
+        resposta = jsonify({
+            'success': True,
+            'doacoes': doacoes_dict,
+            'message': 'Doações registradas com sucesso!'
+        }), 201
+        # Com Idempotency-Key, a resposta é guardada no mesmo commit das doações
+        guardar_resposta(resposta)
+
+        db.session.commit()
+        limpar_estatisticas()
+        email_worker.notificar(current_app._get_current_object())
+
+        return resposta
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def buscar_doacao(doacao_id):
+    """Doação da tabela quente ou, se já foi arquivada (e não excluída), do arquivo"""
+    doacao = db.session.get(Doacao, doacao_id)
+    if doacao is None:
+        doacao = DoacaoArquivada.query.filter_by(id=doacao_id, excluida_em=None).first()
+    return doacao
+
 @doacoes_bp.route('/<int:doacao_id>', methods=['PUT'])
 @jwt_required()
 def update_doacao(doacao_id):
     try:
-        doacao = Doacao.query.get_or_404(doacao_id)
+        doacao = buscar_doacao(doacao_id)
+        if doacao is None:
+            return jsonify({'error': 'Doação não encontrada'}), 404
         data = request.get_json()
 
         nome = data.get('nome', '').strip()
@@ -166,12 +442,21 @@ def update_doacao(doacao_id):
         if tipo not in ['livro', 'jogo']:
             return jsonify({'error': 'Tipo deve ser "livro" ou "jogo"'}), 400
 
+        # Tipo e doador entram nos resumos diários: move a contagem se mudarem
+        if (tipo, email) != (doacao.tipo, doacao.email):
+            atualizar_resumos([doacao], sinal=-1)
+            atualizar_resumos([{
+                'created_at': doacao.created_at, 'tipo': tipo, 'livro_id': doacao.livro_id,
+                'email': email, 'nome': nome
+            }])
+
         doacao.nome = nome
         doacao.email = email
         doacao.tipo = tipo
         doacao.item = item
 
         db.session.commit()
+        limpar_estatisticas()
 
         return jsonify({
             'success': True,
@@ -186,17 +471,25 @@ def update_doacao(doacao_id):
 @jwt_required()
 def delete_doacao(doacao_id):
     try:
-        doacao = Doacao.query.get_or_404(doacao_id)
+        doacao = buscar_doacao(doacao_id)
+        if doacao is None:
+            return jsonify({'error': 'Doação não encontrada'}), 404
 
         # Se foi doação de livro, devolver a quantidade
         if doacao.tipo == 'livro' and doacao.livro_id:
-            livro = Livro.query.get(doacao.livro_id)
-            if livro:
-                livro.quantidade += 1
-                livro.updated_at = datetime.utcnow()
+            Livro.devolver_exemplar(doacao.livro_id)
+            marcar_livros_alterados(doacao.livro_id)
+
+        atualizar_resumos([doacao], sinal=-1)
 
-        db.session.delete(doacao)
+        # Exclusão lógica: a doação vai para o arquivo (ou, se já está nele) marcada como excluída
+        if isinstance(doacao, DoacaoArquivada):
+            doacao.excluida_em = datetime.utcnow()
+        else:
+            db.session.add(DoacaoArquivada.de_doacao(doacao, excluida=True))
+            db.session.delete(doacao)
         db.session.commit()
+        limpar_estatisticas()
 
         return jsonify({
             'success': True,
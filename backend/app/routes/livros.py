@@ -1,36 +1,164 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from app import db
-from app.models import Livro, Doacao
+from app.models import Livro, Doacao, DoacaoArquivada, ResumoDoacoesDia
+from app.utils.pagination import CursorInvalido, decode_cursor, paginar, parse_limit
+from app.utils.search import aplicar_busca
+from app.utils.cache import limpar_estatisticas
+from app.utils.replica import usar_replica
+from app.utils.importacao import importar_livros, ler_arquivo_livros, ler_livros_csv
+from app.utils.http_cache import aplicar_cache_headers, calcular_etag, resposta_nao_modificada
+from app.utils.eventos import (
+    barramento, gerar_eventos, marcar_livros_alterados, marcar_livros_removidos, ouvinte_postgres, usar_postgres
+)
+from app.utils.sugestoes import indice_sugestoes
+from app.utils.snapshot import diretorio as diretorio_snapshot, leitor_snapshot, publicador_snapshot
 from datetime import datetime
 
 livros_bp = Blueprint('livros', __name__)
 
+def versao_catalogo():
+    """Total de livros e última atualização: muda a cada escrita no catálogo"""
+    return db.session.query(db.func.count(Livro.id), db.func.max(Livro.updated_at)).one()
+
+def versao_titulos():
+    """Total de livros e última mudança de título/autor: doações e estoque não alteram"""
+    return db.session.query(db.func.count(Livro.id), db.func.max(Livro.catalogado_em)).one()
+
+def contagem_doacoes():
+    """Subquery (livro_id, total) com as doações de cada livro, agregadas dos resumos diários.
+
+    Conta as doações ativas e as arquivadas (não excluídas), como o delete_livro.
+    """
+    return (
+        db.select(ResumoDoacoesDia.livro_id, db.func.sum(ResumoDoacoesDia.total).label('total'))
+        .where(ResumoDoacoesDia.livro_id != 0)
+        .group_by(ResumoDoacoesDia.livro_id)
+        .subquery()
+    )
+
 @livros_bp.route('', methods=['GET'])
+@usar_replica
 def get_livros():
     try:
+        # Catálogo completo (sem parâmetros): servido do snapshot em disco, sem tocar no banco
+        if not request.args and diretorio_snapshot(current_app):
+            app = current_app._get_current_object()
+            response = leitor_snapshot.resposta(app)
+            if response is not None:
+                return response
+            # Snapshot ausente ou desatualizado: consulta ao vivo e agenda um novo
+            publicador_snapshot.agendar(app)
+
+        # Consulta barata de versão; se o cliente já tem esta versão, responde 304 sem serializar
+        total, ultima_atualizacao = versao_catalogo()
+        etag = calcular_etag(total, ultima_atualizacao, request.query_string.decode())
+        max_age = current_app.config.get('CATALOG_CACHE_MAX_AGE', 0)
+        nao_modificado = resposta_nao_modificada(etag, ultima_atualizacao, max_age)
+        if nao_modificado is not None:
+            return nao_modificado
+
         search = request.args.get('search', '')
         
         query = Livro.query
+        relevancia = None
         
         if search:
-            query = query.filter(
-                db.or_(
-                    Livro.titulo.ilike(f'%{search}%'),
-                    Livro.autor.ilike(f'%{search}%')
-                )
+            query, relevancia = aplicar_busca(query, Livro, search)
+        
+        # Lê só as colunas do to_dict(); o provider JSON serializa as datas
+        query = query.with_entities(*Livro.colunas_dict()).order_by(Livro.titulo, Livro.id)
+
+        # Contagem de doações por livro no mesmo SELECT (LEFT JOIN numa subquery agrupada)
+        if request.args.get('with_counts', '').lower() in ('1', 'true'):
+            contagens = contagem_doacoes()
+            query = query.outerjoin(contagens, contagens.c.livro_id == Livro.id).add_columns(
+                db.func.coalesce(contagens.c.total, 0).label('doacoes_count')
             )
+
+        # Paginação por cursor (keyset) quando o cliente pede 'limit' ou 'cursor'
+        if 'limit' in request.args or 'cursor' in request.args:
+            limite = parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            if cursor:
+                titulo, livro_id = decode_cursor(cursor, str, int)
+                query = query.filter(
+                    db.or_(
+                        Livro.titulo > titulo,
+                        db.and_(Livro.titulo == titulo, Livro.id > livro_id)
+                    )
+                )
+
+            livros, next_cursor = paginar(query, limite, lambda l: (l.titulo, l.id))
+
+            response = jsonify({
+                'success': True,
+                'livros': [livro._asdict() for livro in livros],
+                'next_cursor': next_cursor
+            })
+            return aplicar_cache_headers(response, etag, ultima_atualizacao, max_age)
+
+        # Sem paginação, a busca textual ordena os resultados por relevância
+        if relevancia is not None:
+            query = query.order_by(None).order_by(relevancia, Livro.titulo, Livro.id)
+
+        livros = query.all()
         
-        livros = query.order_by(Livro.titulo).all()
+        response = jsonify({
+            'success': True,
+            'livros': [livro._asdict() for livro in livros]
+        })
+        return aplicar_cache_headers(response, etag, ultima_atualizacao, max_age)
         
+    except CursorInvalido as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@livros_bp.route('/suggest', methods=['GET'])
+@usar_replica
+def suggest_livros():
+    """Autocomplete: até 'limit' livros {id, titulo, autor} servidos do índice em memória"""
+    try:
+        termo = request.args.get('q', '')
+        try:
+            limite = int(request.args.get('limit', current_app.config['SUGGEST_LIMIT']))
+        except ValueError:
+            return jsonify({'error': 'limit deve ser um número inteiro'}), 400
+        limite = max(1, min(limite, current_app.config['SUGGEST_MAX_LIMIT']))
+
+        indice_sugestoes.garantir_atualizado(
+            current_app._get_current_object(), versao_titulos, current_app.config['SUGGEST_VERSION_INTERVAL']
+        )
+
         return jsonify({
             'success': True,
-            'livros': [livro.to_dict() for livro in livros]
+            'sugestoes': indice_sugestoes.sugerir(termo, limite)
         })
-        
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@livros_bp.route('/events', methods=['GET'])
+def livros_events():
+    """Stream SSE com as mudanças de estoque do catálogo ({id, quantidade, updated_at})"""
+    app = current_app._get_current_object()
+    if barramento.conexoes() >= app.config['LIVROS_EVENTS_MAX_CONEXOES']:
+        response = jsonify({'error': 'Muitas conexões de eventos abertas; tente novamente'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    if usar_postgres(app):
+        ouvinte_postgres.iniciar(app)
+
+    fila = barramento.assinar(request.headers.get('Last-Event-ID'))
+    return current_app.response_class(
+        gerar_eventos(fila, app.config['LIVROS_EVENTS_KEEPALIVE'], app.config['LIVROS_EVENTS_MAX_DURACAO'],
+                      usar_postgres(app)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @livros_bp.route('', methods=['POST'])
 @jwt_required()
 def create_livro():
@@ -59,7 +187,10 @@ def create_livro():
         )
         
         db.session.add(livro)
+        marcar_livros_alterados(livro)
         db.session.commit()
+        limpar_estatisticas()
+        indice_sugestoes.atualizar(livro)
         
         return jsonify({
             'success': True,
@@ -70,6 +201,43 @@ def create_livro():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@livros_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_livros():
+    try:
+        # Aceita arquivo enviado (campo 'arquivo'), corpo JSON ou corpo text/csv
+        try:
+            if 'arquivo' in request.files:
+                arquivo = request.files['arquivo']
+                registros = ler_arquivo_livros(arquivo.filename or '', arquivo.read().decode('utf-8-sig'))
+            elif request.is_json:
+                dados = request.get_json()
+                registros = dados.get('livros', []) if isinstance(dados, dict) else dados
+            elif request.mimetype == 'text/csv':
+                registros = ler_livros_csv(request.get_data(as_text=True))
+            else:
+                return jsonify({'error': 'Envie um arquivo CSV/JSON ou uma lista JSON de livros'}), 400
+        except ValueError as e:
+            return jsonify({'error': f'Arquivo inválido: {e}'}), 400
+
+        if not isinstance(registros, list):
+            return jsonify({'error': 'Envie uma lista de livros'}), 400
+
+        relatorio, resumo = importar_livros(registros)
+        db.session.commit()
+        limpar_estatisticas()
+        indice_sugestoes.invalidar()
+
+        return jsonify({
+            'success': True,
+            'resumo': resumo,
+            'relatorio': relatorio
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @livros_bp.route('/<int:livro_id>', methods=['PUT'])
 @jwt_required()
 def update_livro(livro_id):
@@ -97,12 +265,17 @@ def update_livro(livro_id):
         if existing:
             return jsonify({'error': 'Já existe outro livro com este título e autor'}), 400
         
+        if (titulo, autor) != (livro.titulo, livro.autor):
+            livro.catalogado_em = datetime.utcnow()
         livro.titulo = titulo
         livro.autor = autor
         livro.quantidade = quantidade
         livro.updated_at = datetime.utcnow()
+        marcar_livros_alterados(livro)
         
         db.session.commit()
+        limpar_estatisticas()
+        indice_sugestoes.atualizar(livro)
         
         return jsonify({
             'success': True,
@@ -119,15 +292,23 @@ def delete_livro(livro_id):
     try:
         livro = Livro.query.get_or_404(livro_id)
         
-        # Verificar se existem doações relacionadas
-        doacoes_count = Doacao.query.filter_by(livro_id=livro_id).count()
+        # Verificar se existem doações relacionadas (inclusive no histórico arquivado)
+        doacoes_count = Doacao.query.filter_by(livro_id=livro_id).count() + (
+            DoacaoArquivada.query
+            .filter_by(livro_id=livro_id)
+            .filter(DoacaoArquivada.excluida_em.is_(None))
+            .count()
+        )
         if doacoes_count > 0:
             return jsonify({
                 'error': f'Não é possível excluir este livro pois existem {doacoes_count} doação(ões) relacionada(s)'
             }), 400
         
         db.session.delete(livro)
+        marcar_livros_removidos(livro_id)
         db.session.commit()
+        limpar_estatisticas()
+        indice_sugestoes.remover(livro_id)
         
         return jsonify({
             'success': True,
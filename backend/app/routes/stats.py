@@ -1,30 +1,119 @@
-from flask import Blueprint, jsonify
+from datetime import timedelta
+from flask import Blueprint, jsonify, current_app, request
 from flask_jwt_extended import jwt_required
 from app import db
-from app.models import Livro, Doacao
+from app.models import Livro, ResumoDoacoesDia
+from app.utils.cache import stats_cache, timeseries_cache
+from app.utils.replica import usar_replica
+from app.utils.email_queue import profundidade_fila
+from app.utils.resumos import GRANULARIDADES, PeriodoInvalido, serie_temporal, top_livros, top_doadores
+from app.utils.validators import parse_periodo
+
+TOP_PADRAO = 10
+TOP_MAX = 100
 
 stats_bp = Blueprint('stats', __name__)
 
+def calcular_stats():
+    """Calcula todas as estatísticas em uma única consulta agregada.
+
+    As doações vêm dos resumos diários, que também contam as doações arquivadas.
+    """
+    livros = db.select(
+        db.func.count(Livro.id).label('total_livros'),
+        db.func.coalesce(db.func.sum(Livro.quantidade), 0).label('livros_disponiveis')
+    ).subquery()
+    doacoes = db.select(
+        db.func.coalesce(db.func.sum(ResumoDoacoesDia.total), 0).label('total_doacoes'),
+        db.func.coalesce(
+            db.func.sum(ResumoDoacoesDia.total).filter(ResumoDoacoesDia.tipo == 'livro'), 0
+        ).label('doacoes_livros'),
+        db.func.coalesce(
+            db.func.sum(ResumoDoacoesDia.total).filter(ResumoDoacoesDia.tipo == 'jogo'), 0
+        ).label('doacoes_jogos')
+    ).subquery()
+
+    row = db.session.execute(
+        db.select(livros, doacoes).select_from(livros.join(doacoes, db.true()))
+    ).one()
+
+    return {
+        'total_livros': row.total_livros,
+        'total_doacoes': int(row.total_doacoes),
+        'doacoes_livros': int(row.doacoes_livros),
+        'doacoes_jogos': int(row.doacoes_jogos),
+        'livros_disponiveis': int(row.livros_disponiveis)
+    }
+
 @stats_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@usar_replica
 def get_stats():
     try:
-        total_livros = Livro.query.count()
-        total_doacoes = Doacao.query.count()
-        doacoes_livros = Doacao.query.filter_by(tipo='livro').count()
-        doacoes_jogos = Doacao.query.filter_by(tipo='jogo').count()
-        livros_disponiveis = db.session.query(db.func.sum(Livro.quantidade)).scalar() or 0
-        
+        stats = stats_cache.get_or_set(
+            'stats', calcular_stats, ttl=current_app.config.get('STATS_CACHE_TTL')
+        )
+
         return jsonify({
             'success': True,
-            'stats': {
-                'total_livros': total_livros,
-                'total_doacoes': total_doacoes,
-                'doacoes_livros': doacoes_livros,
-                'doacoes_jogos': doacoes_jogos,
-                'livros_disponiveis': livros_disponiveis
-            }
+            'stats': stats
         })
-        
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stats_bp.route('/stats/emails', methods=['GET'])
+@jwt_required()
+def get_fila_emails():
+    try:
+        return jsonify({
+            'success': True,
+            'fila': profundidade_fila()
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stats_bp.route('/stats/timeseries', methods=['GET'])
+@jwt_required()
+@usar_replica
+def get_timeseries():
+    try:
+        granularidade = request.args.get('granularity', 'day')
+        if granularidade not in GRANULARIDADES:
+            return jsonify({'error': 'granularity deve ser "day", "week" ou "month"'}), 400
+
+        try:
+            inicio, fim = parse_periodo(request.args.get('from'), request.args.get('to'))
+            top = int(request.args.get('top', TOP_PADRAO))
+        except ValueError:
+            return jsonify({'error': 'Parâmetros inválidos'}), 400
+        top = max(1, min(top, TOP_MAX))
+
+        # Os resumos são diários: converte o período em datas inclusivas
+        inicio = inicio.date() if inicio else None
+        fim = (fim - timedelta(microseconds=1)).date() if fim else None
+        if inicio and fim and inicio > fim:
+            return jsonify({'error': '"from" deve ser anterior a "to"'}), 400
+
+        def calcular():
+            return {
+                'granularity': granularidade,
+                'from': inicio.isoformat() if inicio else None,
+                'to': fim.isoformat() if fim else None,
+                'series': serie_temporal(granularidade, inicio, fim, current_app.config['STATS_TIMESERIES_MAX_PERIODOS']),
+                'top_livros': top_livros(top, inicio, fim),
+                'top_doadores': top_doadores(top, inicio, fim)
+            }
+
+        resultado = timeseries_cache.get_or_set(
+            (granularidade, inicio, fim, top), calcular,
+            ttl=current_app.config.get('STATS_CACHE_TTL')
+        )
+
+        return jsonify({'success': True, **resultado})
+
+    except PeriodoInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
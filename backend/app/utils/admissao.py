@@ -0,0 +1,183 @@
+import math
+import threading
+import time
+
+from flask import g, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request
+
+# Métricas e health checks não passam pela admissão. O SSE passa: a vaga vale só
+# para abrir a conexão (é liberada quando o stream começa) e o stream tem limite próprio
+ROTAS_ISENTAS = {'exportar_metricas', 'health_check', 'pool_status', 'static'}
+# Redução multiplicativa do limite quando a latência passa do alvo (AIMD)
+FATOR_REDUCAO = 0.9
+
+
+class LimiteAdaptativo:
+    """Limite de concorrência de uma rota com fila de espera limitada (por processo).
+
+    No máximo `limite` requisições rodam ao mesmo tempo e até `fila` aguardam
+    por no máximo `espera` segundos; as demais são recusadas na hora. O limite
+    se ajusta por AIMD: cresce 1 a cada `limite` respostas dentro da latência
+    alvo com a rota saturada, e cai 10% (no máximo uma vez por intervalo alvo)
+    quando a latência passa do alvo ou a rota responde 5xx.
+    """
+
+    def __init__(self, maximo, fila, espera, alvo, minimo=1):
+        self.maximo = maximo
+        self.minimo = minimo
+        self.limite = float(maximo)
+        self.fila = fila
+        self.espera = espera
+        self.alvo = alvo
+        self.ativos = 0
+        self.aguardando = 0
+        self.recusadas = 0
+        self.latencia = alvo  # Média móvel da latência, usada no Retry-After
+        self._ultima_reducao = 0.0
+        self._condicao = threading.Condition()
+
+    def entrar(self):
+        """Ocupa uma vaga (esperando na fila se preciso); False se a requisição deve ser recusada"""
+        with self._condicao:
+            if self.ativos < int(self.limite) and not self.aguardando:
+                self.ativos += 1
+                return True
+            if self.aguardando >= self.fila:
+                self.recusadas += 1
+                return False
+
+            self.aguardando += 1
+            try:
+                liberada = self._condicao.wait_for(lambda: self.ativos < int(self.limite), timeout=self.espera)
+            finally:
+                self.aguardando -= 1
+            if not liberada:
+                self.recusadas += 1
+                return False
+            self.ativos += 1
+            return True
+
+    def sair(self, duracao=None, erro=False):
+        """Libera a vaga; com `duracao`, ajusta o limite pela latência observada"""
+        with self._condicao:
+            saturada = self.ativos >= int(self.limite) or self.aguardando > 0
+            self.ativos -= 1
+            if duracao is not None:
+                self.latencia = 0.8 * self.latencia + 0.2 * duracao
+                agora = time.monotonic()
+                if duracao > self.alvo or erro:
+                    if agora - self._ultima_reducao >= self.alvo:
+                        self.limite = max(self.minimo, self.limite * FATOR_REDUCAO)
+                        self._ultima_reducao = agora
+                elif saturada:
+                    self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            self._condicao.notify()
+
+    def retry_after(self):
+        """Segundos sugeridos ao cliente: o tempo para a fila atual ser atendida"""
+        return max(1, math.ceil(self.latencia * (self.fila + 1) / max(int(self.limite), 1)))
+
+
+class ControleAdmissao:
+    """Um LimiteAdaptativo por (classe, rota); as classes não disputam vagas entre si"""
+
+    def __init__(self, config):
+        self._config = config
+        self._limites = {}
+        self._lock = threading.Lock()
+
+    def limite(self, classe, endpoint):
+        chave = (classe, endpoint)
+        limite = self._limites.get(chave)
+        if limite is None:
+            with self._lock:
+                limite = self._limites.get(chave)
+                if limite is None:
+                    prefixo = 'ADMISSION_PUBLIC' if classe == 'publico' else 'ADMISSION_ADMIN'
+                    limite = self._limites[chave] = LimiteAdaptativo(
+                        self._config[f'{prefixo}_MAX_CONCURRENCY'],
+                        self._config[f'{prefixo}_QUEUE'],
+                        self._config[f'{prefixo}_QUEUE_TIMEOUT'],
+                        self._config['ADMISSION_TARGET_LATENCY']
+                    )
+        return limite
+
+    def exportar(self):
+        """Linhas no formato do Prometheus com o estado de cada limite"""
+        series = (
+            ('admission_concurrency_limit', 'gauge', 'Limite de concorrência atual.', lambda l: f'{l.limite:.2f}'),
+            ('admission_in_flight', 'gauge', 'Requisições em execução.', lambda l: l.ativos),
+            ('admission_queued', 'gauge', 'Requisições aguardando vaga.', lambda l: l.aguardando),
+            ('admission_rejected_total', 'counter', 'Requisições recusadas (503).', lambda l: l.recusadas),
+        )
+        with self._lock:
+            limites = sorted(self._limites.items())
+        linhas = []
+        for nome, tipo, ajuda, valor in series:
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} {tipo}')
+            for (classe, endpoint), limite in limites:
+                linhas.append(f'{nome}{{class="{classe}",endpoint="{endpoint}"}} {valor(limite)}')
+        return linhas
+
+
+def classificar():
+    """'admin' para requisições com JWT válido, 'publico' para as demais.
+
+    O token é verificado (não basta enviar o cabeçalho) para que um cliente
+    anônimo não escape da classe pública.
+    """
+    if 'Authorization' not in request.headers:
+        return 'publico'
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return 'publico'
+    return 'admin' if g.get('_jwt_extended_jwt') else 'publico'
+
+
+def init_admissao(app):
+    """Controle de admissão por rota para as requisições da API"""
+    if not app.config['ADMISSION_ENABLED']:
+        return
+
+    controle = ControleAdmissao(app.config)
+    app.extensions['admissao'] = controle
+
+    from app.utils.metrics import metrics
+    metrics.coletores['admissao'] = controle.exportar
+
+    @app.before_request
+    def admitir():
+        if (request.endpoint is None or request.endpoint in ROTAS_ISENTAS
+                or request.method == 'OPTIONS' or not request.path.startswith('/api/')):
+            return None
+
+        limite = controle.limite(classificar(), request.endpoint)
+        if not limite.entrar():
+            response = jsonify({'error': 'Serviço sobrecarregado. Tente novamente em instantes.'})
+            response.headers['Retry-After'] = str(limite.retry_after())
+            return response, 503
+
+        g.admissao = (limite, time.perf_counter())
+        return None
+
+    @app.after_request
+    def observar(response):
+        if 'admissao' in g:
+            # Streams (exportação) duram o download inteiro: não entram no ajuste por latência
+            g.admissao_stream = response.is_streamed
+            g.admissao_erro = response.status_code >= 500
+        return response
+
+    @app.teardown_request
+    def liberar(excecao=None):
+        admissao = g.pop('admissao', None)
+        if admissao is None:
+            return
+        limite, inicio = admissao
+        if g.get('admissao_stream'):
+            limite.sair()
+        else:
+            erro = excecao is not None or g.get('admissao_erro', False)
+            limite.sair(time.perf_counter() - inicio, erro)
@@ -0,0 +1,65 @@
+import time
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+from app import db
+from app.models import Doacao, DoacaoArquivada
+
+TAMANHO_LOTE = 5000
+
+# Colunas copiadas da tabela quente para o arquivo
+COLUNAS = ['id', 'nome', 'email', 'tipo', 'item', 'livro_id', 'created_at']
+
+
+def arquivar_doacoes(antes, tamanho_lote=TAMANHO_LOTE):
+    """Move as doações criadas antes de `antes` para doacoes_arquivadas, em lotes.
+
+    Cada lote é uma transação curta (INSERT ... SELECT + DELETE). O estoque
+    dos livros e os resumos diários não mudam: a doação continua existindo,
+    só sai da tabela quente. Retorna quantas doações foram movidas.
+    """
+    movidas = 0
+    while True:
+        # SKIP LOCKED (PostgreSQL): não espera por doações sendo excluídas agora
+        ids = db.session.scalars(
+            db.select(Doacao.id)
+            .where(Doacao.created_at < antes)
+            .order_by(Doacao.created_at, Doacao.id)
+            .limit(tamanho_lote)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            break
+
+        db.session.execute(db.insert(DoacaoArquivada).from_select(
+            COLUNAS + ['arquivada_em'],
+            db.select(*[getattr(Doacao, col) for col in COLUNAS], db.literal(datetime.utcnow()))
+            .where(Doacao.id.in_(ids))
+        ))
+        db.session.execute(
+            db.delete(Doacao).where(Doacao.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        movidas += len(ids)
+
+    return movidas
+
+
+doacoes_cli = AppGroup('doacoes', help='Manutenção da tabela de doações.')
+
+
+@doacoes_cli.command('archive')
+@click.option('--before', 'antes', required=True, help='Arquiva as doações criadas antes desta data (ISO 8601).')
+@click.option('--lote', default=TAMANHO_LOTE, show_default=True, help='Doações movidas por transação.')
+def arquivar_comando(antes, lote):
+    """Move doações antigas para a tabela de arquivo."""
+    try:
+        data = datetime.fromisoformat(antes)
+    except ValueError:
+        raise click.BadParameter('Data inválida', param_hint='--before')
+
+    inicio = time.perf_counter()
+    movidas = arquivar_doacoes(data, tamanho_lote=lote)
+    click.echo(f'{movidas} doação(ões) arquivada(s) em {time.perf_counter() - inicio:.2f}s')
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache em memória (por processo) com expiração por tempo.
+
+    Com `maxsize`, descarta as entradas usadas há mais tempo (LRU) ao encher.
+    """
+
+    def __init__(self, ttl=30, maxsize=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em <= time.monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl=None):
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._dados[chave] = (valor, expira_em)
+            self._dados.move_to_end(chave)
+            if self.maxsize is not None:
+                while len(self._dados) > self.maxsize:
+                    self._dados.popitem(last=False)
+
+    def get_or_set(self, chave, calcular, ttl=None):
+        valor = self.get(chave)
+        if valor is None:
+            valor = calcular()
+            self.set(chave, valor, ttl)
+        return valor
+
+    def delete(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+
+# Estatísticas do painel; invalidado pelas rotas de escrita de livros e doações
+stats_cache = TTLCache()
+# Séries de /api/stats/timeseries: a chave vem dos parâmetros do cliente (período, top),
+# então o cache é separado e limitado, sem crescer nem descartar as estatísticas do painel
+timeseries_cache = TTLCache(maxsize=256)
+
+
+def limpar_estatisticas():
+    """Invalida os caches de estatísticas (após escritas em livros e doações)"""
+    stats_cache.clear()
+    timeseries_cache.clear()
+
+# Identidades de admins e status de revogação dos JWTs (callbacks do JWTManager)
+admins_cache = TTLCache(maxsize=1024)
+tokens_revogados_cache = TTLCache(maxsize=10000)
@@ -0,0 +1,69 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+from flask import request
+
+# Tipos que valem a pena comprimir (JSON, CSV, texto)
+TIPOS_COMPRIMIVEIS = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def algoritmos_disponiveis(app):
+    configurados = [a.strip() for a in app.config['COMPRESS_ALGORITHMS'].split(',') if a.strip()]
+    return [a for a in configurados if a == 'gzip' or (a == 'br' and brotli is not None)]
+
+
+def escolher_algoritmo(algoritmos):
+    """Primeiro algoritmo configurado que o cliente aceita (Accept-Encoding), ou None"""
+    aceitos = request.accept_encodings
+    for algoritmo in algoritmos:
+        if aceitos.quality(algoritmo) > 0:
+            return algoritmo
+    return None
+
+
+def comprimir(dados, algoritmo, config):
+    if algoritmo == 'br':
+        return brotli.compress(dados, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(dados, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def init_compressao(app):
+    """Comprime respostas acima de COMPRESS_MIN_SIZE bytes com br ou gzip"""
+    algoritmos = algoritmos_disponiveis(app)
+    if app.config['COMPRESS_MIN_SIZE'] <= 0 or not algoritmos:
+        return
+
+    @app.after_request
+    def comprimir_resposta(response):
+        # Streams (exportação) e respostas já codificadas seguem como estão
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or not (response.mimetype or '').startswith(TIPOS_COMPRIMIVEIS)
+                or response.cache_control.no_transform):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if response.content_length is not None and response.content_length < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        algoritmo = escolher_algoritmo(algoritmos)
+        if algoritmo is None:
+            return response
+
+        dados = response.get_data()
+        if len(dados) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        response.set_data(comprimir(dados, algoritmo, app.config))
+        response.headers['Content-Encoding'] = algoritmo
+
+        # O corpo comprimido é outra representação: o ETag passa a ser fraco
+        etag, fraco = response.get_etag()
+        if etag and not fraco:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,225 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+from app.models import FilaEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enfileirar_email(destinatario, assunto, html):
+    """Adiciona um email à fila na transação atual (o commit fica com quem chama)"""
+    email = FilaEmail(destinatario=destinatario, assunto=assunto, html=html)
+    db.session.add(email)
+    return email
+
+
+def _reservar_lote(limite):
+    """Emails a enviar por este processo, sem que outro worker (ou o CLI) pegue os mesmos"""
+    agora = datetime.utcnow()
+
+    # No PostgreSQL, SKIP LOCKED permite vários workers drenando a mesma fila
+    if db.engine.dialect.name == 'postgresql':
+        return FilaEmail.query.filter(
+            FilaEmail.status == 'pendente',
+            FilaEmail.proxima_tentativa_em <= agora
+        ).order_by(FilaEmail.id).limit(limite).with_for_update(skip_locked=True).all()
+
+    # Nos demais bancos, cada email é reservado com um UPDATE condicional: só um
+    # processo vê rowcount 1. A reserva vence em EMAIL_CLAIM_TIMEOUT segundos
+    # (processo que caiu no meio do envio) e o email volta a ser elegível.
+    candidatos = db.session.execute(
+        db.select(FilaEmail.id, FilaEmail.status, FilaEmail.proxima_tentativa_em)
+        .where(FilaEmail.status.in_(('pendente', 'enviando')), FilaEmail.proxima_tentativa_em <= agora)
+        .order_by(FilaEmail.id)
+        .limit(limite)
+    ).all()
+    vence_em = agora + timedelta(seconds=current_app.config['EMAIL_CLAIM_TIMEOUT'])
+    reservados = []
+    for email_id, status, proxima in candidatos:
+        atualizados = db.session.execute(
+            db.update(FilaEmail)
+            .where(FilaEmail.id == email_id, FilaEmail.status == status,
+                   FilaEmail.proxima_tentativa_em == proxima)
+            .values(status='enviando', proxima_tentativa_em=vence_em)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if atualizados == 1:
+            reservados.append(email_id)
+    db.session.commit()
+
+    if not reservados:
+        return []
+    return FilaEmail.query.filter(FilaEmail.id.in_(reservados)).order_by(FilaEmail.id).all()
+
+
+def _agendar_retentativa(email, erro):
+    config = current_app.config
+    email.tentativas += 1
+    email.ultimo_erro = str(erro)[:1000]
+
+    if email.tentativas >= config['EMAIL_MAX_TENTATIVAS']:
+        email.status = 'falhou'
+        logger.error('Email %s para %s descartado após %s tentativas: %s',
+                     email.id, email.destinatario, email.tentativas, erro)
+        return
+
+    # Backoff exponencial: base, 2x base, 4x base...
+    email.status = 'pendente'
+    atraso = config['EMAIL_BACKOFF_BASE'] * 2 ** (email.tentativas - 1)
+    email.proxima_tentativa_em = datetime.utcnow() + timedelta(seconds=atraso)
+    logger.warning('Falha ao enviar email %s para %s (tentativa %s, nova tentativa em %ss): %s',
+                   email.id, email.destinatario, email.tentativas, atraso, erro)
+
+
+_mail_lock = threading.Lock()
+
+
+def obter_mail(app):
+    """Flask-Mail do app, inicializado no primeiro envio (fora do caminho de inicialização)"""
+    with _mail_lock:
+        mail = app.extensions.get('mail')
+        if mail is None:
+            from flask_mail import Mail
+            Mail(app)
+            mail = app.extensions['mail']
+        return mail
+
+
+def processar_lote(limite=None):
+    """Envia um lote de emails pendentes usando uma única conexão SMTP.
+
+    Retorna a quantidade de emails enviados com sucesso.
+    """
+    limite = limite or current_app.config['EMAIL_BATCH_SIZE']
+    emails = _reservar_lote(limite)
+    if not emails:
+        db.session.commit()
+        return 0
+
+    from flask_mail import Message
+
+    remetente = current_app.config.get('MAIL_DEFAULT_SENDER')
+    processados = set()
+    enviados = 0
+
+    try:
+        with obter_mail(current_app._get_current_object()).connect() as conn:
+            for email in emails:
+                try:
+                    conn.send(Message(
+                        subject=email.assunto,
+                        sender=remetente,
+                        recipients=[email.destinatario],
+                        html=email.html
+                    ))
+                    email.status = 'enviado'
+                    email.enviado_em = datetime.utcnow()
+                    email.ultimo_erro = None
+                    enviados += 1
+                except Exception as e:
+                    _agendar_retentativa(email, e)
+                processados.add(email.id)
+    except Exception as e:
+        # Falha ao abrir/fechar a conexão: o restante do lote volta para a fila
+        for email in emails:
+            if email.id not in processados:
+                _agendar_retentativa(email, e)
+
+    db.session.commit()
+    return enviados
+
+
+def profundidade_fila():
+    """Quantidade de emails na fila agrupada por status"""
+    contagens = dict(
+        db.session.query(FilaEmail.status, db.func.count(FilaEmail.id))
+        .group_by(FilaEmail.status)
+        .all()
+    )
+    return {status: contagens.get(status, 0) for status in ('pendente', 'enviando', 'enviado', 'falhou')}
+
+
+class EmailWorker:
+    """Thread única por processo que drena a fila em segundo plano"""
+
+    def __init__(self):
+        self._evento = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def notificar(self, app):
+        """Acorda o worker (iniciando-o se preciso) após um email ser enfileirado"""
+        if not app.config.get('EMAIL_WORKER_ENABLED', True):
+            return
+
+        with self._lock:
+            # Após um fork (gunicorn), a thread do processo pai não existe no filho
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._executar, args=(app,), name='email-worker', daemon=True
+                )
+                self._thread.start()
+
+        self._evento.set()
+
+    def iniciar(self, app):
+        """Inicia o worker no startup do processo, drenando o que já está na fila.
+
+        Sem isso, emails pendentes (retentativas agendadas, envios de um processo
+        que caiu) só seriam enviados quando uma nova doação chegasse a este processo.
+        """
+        self.notificar(app)
+
+    def _executar(self, app):
+        intervalo = app.config['EMAIL_POLL_INTERVAL']
+        while True:
+            self._evento.wait(intervalo)
+            self._evento.clear()
+            with app.app_context():
+                try:
+                    while processar_lote():
+                        pass
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Erro ao processar a fila de emails')
+
+
+email_worker = EmailWorker()
+
+
+emails_cli = AppGroup('emails', help='Fila de emails de agradecimento.')
+
+
+@emails_cli.command('processar')
+@click.option('--loop', is_flag=True, help='Continua processando a fila indefinidamente.')
+def processar_comando(loop):
+    """Envia os emails pendentes da fila."""
+    intervalo = current_app.config['EMAIL_POLL_INTERVAL']
+    while True:
+        total = 0
+        while True:
+            enviados = processar_lote()
+            total += enviados
+            if not enviados:
+                break
+        click.echo(f'{total} email(s) enviado(s)')
+        if not loop:
+            break
+        time.sleep(intervalo)
+
+
+@emails_cli.command('status')
+def status_comando():
+    """Mostra a profundidade da fila de emails."""
+    for status, quantidade in profundidade_fila().items():
+        click.echo(f'{status}: {quantidade}')
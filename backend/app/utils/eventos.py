@@ -0,0 +1,269 @@
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+import uuid
+from collections import deque
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import Livro
+from app.utils.replica import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+CANAL_POSTGRES = 'livros_estoque'
+# Intervalo (ms) que o EventSource espera antes de reconectar
+RETRY_MS = 3000
+# O NOTIFY do PostgreSQL aceita até 8000 bytes por payload
+DELTAS_POR_NOTIFY = 80
+
+
+class Barramento:
+    """Pub/sub em memória (por processo) dos eventos de estoque do catálogo.
+
+    Cada conexão SSE assina uma fila limitada; quem não consome a tempo perde a
+    fila e recebe um 'reset' (recarregar a lista inteira). Os últimos eventos
+    ficam guardados para retomar uma conexão pelo Last-Event-ID.
+    """
+
+    def __init__(self, historico=256, tamanho_fila=256):
+        self._assinantes = set()
+        self._historico = deque(maxlen=historico)
+        self._tamanho_fila = tamanho_fila
+        self._lock = threading.Lock()
+        self._sequencia = 0
+        self._pid = None
+        self._token = None
+
+    def _preparar_processo(self):
+        # Após um fork (gunicorn), o processo filho começa com um barramento novo
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._token = uuid.uuid4().hex[:8]
+            self._assinantes = set()
+            self._historico.clear()
+            self._sequencia = 0
+
+    def publicar(self, tipo, dados):
+        with self._lock:
+            self._preparar_processo()
+            self._sequencia += 1
+            evento = (f'{self._token}-{self._sequencia}', tipo, dados)
+            self._historico.append(evento)
+            for fila in list(self._assinantes):
+                try:
+                    fila.put_nowait(evento)
+                except queue.Full:
+                    self._assinantes.discard(fila)
+                    fila.transbordou = True
+
+    def assinar(self, ultimo_id=None):
+        """Nova fila de eventos; com `ultimo_id`, reenvia o que a conexão perdeu"""
+        fila = queue.Queue(self._tamanho_fila)
+        fila.transbordou = False
+        with self._lock:
+            self._preparar_processo()
+            if ultimo_id:
+                perdidos = self._eventos_apos(ultimo_id)
+                if perdidos is None:
+                    fila.transbordou = True
+                else:
+                    for evento in perdidos[-self._tamanho_fila:]:
+                        fila.put_nowait(evento)
+            self._assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._assinantes.discard(fila)
+
+    def conexoes(self):
+        with self._lock:
+            return len(self._assinantes) if self._pid == os.getpid() else 0
+
+    def _eventos_apos(self, ultimo_id):
+        token, _, sequencia = ultimo_id.partition('-')
+        if token != self._token or not sequencia.isdigit():
+            return None  # Outro processo ou id desconhecido
+        sequencia = int(sequencia)
+        if sequencia == self._sequencia:
+            return []
+        if not self._historico or int(self._historico[0][0].split('-')[1]) > sequencia + 1:
+            return None  # O histórico já descartou parte dos eventos perdidos
+        return [e for e in self._historico if int(e[0].split('-')[1]) > sequencia]
+
+
+barramento = Barramento()
+
+
+class OuvintePostgres:
+    """Thread única por processo que repassa os NOTIFY do PostgreSQL ao barramento"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def iniciar(self, app):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._pid = os.getpid()
+                with app.app_context():
+                    engine = db.engine
+                self._thread = threading.Thread(
+                    target=self._executar, args=(engine,), name='livros-eventos', daemon=True
+                )
+                self._thread.start()
+
+    def _executar(self, engine):
+        while True:
+            conexao = None
+            try:
+                import psycopg2
+
+                # Conexão dedicada (fora do pool), em autocommit, só para o LISTEN
+                url = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+                conexao = psycopg2.connect(url)
+                conexao.autocommit = True
+                with conexao.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CANAL_POSTGRES}')
+                while True:
+                    if select.select([conexao], [], [], 30) == ([], [], []):
+                        continue
+                    conexao.poll()
+                    while conexao.notifies:
+                        aviso = conexao.notifies.pop(0)
+                        mensagem = json.loads(aviso.payload)
+                        barramento.publicar(mensagem['tipo'], mensagem['dados'])
+            except Exception:
+                logger.exception('Conexão LISTEN perdida; reconectando')
+                # Eventos podem ter sido perdidos: os clientes recarregam a lista
+                barramento.publicar('reset', {})
+                threading.Event().wait(5)
+            finally:
+                if conexao is not None:
+                    try:
+                        conexao.close()
+                    except Exception:
+                        pass
+
+
+ouvinte_postgres = OuvintePostgres()
+
+
+def _formatar(id_, tipo, dados):
+    return f'id: {id_}\nevent: {tipo}\ndata: {json.dumps(dados, separators=(",", ":"))}\n\n'
+
+
+def gerar_eventos(fila, keepalive, duracao, entre_workers):
+    """Corpo text/event-stream de uma conexão; encerra após `duracao` segundos
+    (o EventSource reconecta sozinho, liberando a thread do worker de tempos em tempos)
+
+    O primeiro evento ('status') informa se o stream recebe as mudanças de
+    todos os workers; no barramento em memória, só as do próprio worker.
+    """
+    fim = time.monotonic() + duracao
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        yield f'event: status\ndata: {json.dumps({"entre_workers": entre_workers})}\n\n'
+        while True:
+            if fila.transbordou and fila.empty():
+                # Eventos perdidos: o cliente recarrega a lista e recebe os próximos
+                barramento.cancelar(fila)
+                fila = barramento.assinar()
+                yield 'event: reset\ndata: {}\n\n'
+
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                return
+            try:
+                evento = fila.get(timeout=min(keepalive, restante))
+            except queue.Empty:
+                yield ': ping\n\n'  # Mantém proxies abertos e detecta clientes desconectados
+                continue
+            yield _formatar(*evento)
+    finally:
+        barramento.cancelar(fila)
+
+
+def usar_postgres(app):
+    return app.config.get('LIVROS_EVENTS_BACKEND') == 'postgres'
+
+
+def marcar_livros_alterados(*livros):
+    """Agenda um evento de estoque para os livros (ids ou objetos) no próximo commit"""
+    db.session.info.setdefault('livros_alterados', []).extend(livros)
+
+
+def marcar_livros_removidos(*ids):
+    db.session.info.setdefault('livros_removidos', []).extend(ids)
+
+
+def marcar_catalogo_recarregado():
+    """Alterações em massa (importação): os clientes recarregam a lista inteira"""
+    db.session.info['catalogo_recarregado'] = True
+
+
+def _eventos_pendentes(session):
+    info = session.info
+    livros = info.pop('livros_alterados', [])
+    removidos = info.pop('livros_removidos', [])
+    recarregado = info.pop('catalogo_recarregado', False)
+    eventos = []
+
+    if recarregado:
+        return [('reset', {})]
+
+    if livros:
+        session.flush()  # Livros novos só têm id depois do flush
+        ids = {getattr(livro, 'id', livro) for livro in livros}
+        linhas = session.execute(
+            sa.select(Livro.id, Livro.quantidade, Livro.updated_at).where(Livro.id.in_(ids))
+        )
+        deltas = [
+            {'id': id_, 'quantidade': quantidade, 'updated_at': updated_at.isoformat() if updated_at else None}
+            for id_, quantidade, updated_at in linhas
+        ]
+        for inicio in range(0, len(deltas), DELTAS_POR_NOTIFY):
+            eventos.append(('estoque', deltas[inicio:inicio + DELTAS_POR_NOTIFY]))
+
+    if removidos:
+        eventos.append(('removido', [{'id': id_} for id_ in removidos]))
+    return eventos
+
+
+@sa.event.listens_for(RoutingSession, 'before_commit')
+def _preparar_eventos(session):
+    if not any(k in session.info for k in ('livros_alterados', 'livros_removidos', 'catalogo_recarregado')):
+        return
+    eventos = _eventos_pendentes(session)
+    if not eventos:
+        return
+
+    from flask import current_app
+    if usar_postgres(current_app):
+        # NOTIFY na própria transação: só é entregue (a todos os workers) se o commit acontecer
+        for tipo, dados in eventos:
+            session.execute(
+                sa.select(sa.func.pg_notify(CANAL_POSTGRES, json.dumps({'tipo': tipo, 'dados': dados})))
+            )
+    else:
+        session.info['eventos_livros'] = eventos
+
+
+@sa.event.listens_for(RoutingSession, 'after_commit')
+def _publicar_eventos(session):
+    for tipo, dados in session.info.pop('eventos_livros', []):
+        barramento.publicar(tipo, dados)
+
+
+@sa.event.listens_for(RoutingSession, 'after_rollback')
+def _descartar_eventos(session):
+    for chave in ('livros_alterados', 'livros_removidos', 'catalogo_recarregado', 'eventos_livros'):
+        session.info.pop(chave, None)
+
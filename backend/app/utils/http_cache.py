@@ -0,0 +1,27 @@
+import hashlib
+from flask import current_app, request
+
+
+def calcular_etag(*partes):
+    """ETag forte a partir da versão dos dados e dos parâmetros da requisição"""
+    base = '|'.join(str(p) for p in partes)
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+def aplicar_cache_headers(response, etag, last_modified=None, max_age=0):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.must_revalidate = True
+    return response
+
+
+def resposta_nao_modificada(etag, last_modified=None, max_age=0):
+    """Retorna um 304 se o cliente já possui a versão `etag`, senão None"""
+    # Comparação fraca (RFC 9110): o ETag vira fraco quando a resposta é comprimida
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    return aplicar_cache_headers(response, etag, last_modified, max_age)
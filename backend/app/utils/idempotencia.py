@@ -0,0 +1,265 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+import click
+from flask import current_app, g, jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import RespostaIdempotente
+from app.utils.arquivamento import doacoes_cli
+
+CABECALHO = 'Idempotency-Key'
+TAMANHO_MAXIMO_CHAVE = 255
+# Intervalo entre consultas ao aguardar uma execução de outro processo
+INTERVALO_ESPERA = 0.1
+# 4xx que dependem do estado atual, não do corpo da requisição: não são guardados
+STATUS_TRANSITORIOS = {404, 408, 409, 423, 425, 429}
+
+
+class Execucao:
+    """Primeira execução de uma chave neste processo; as repetições simultâneas aguardam o resultado"""
+
+    def __init__(self, hash_requisicao):
+        self.hash_requisicao = hash_requisicao
+        self.pronta = threading.Event()
+        self.resposta = None  # (status, corpo, content_type) quando há o que repetir
+
+
+class ReservaPerdida(Exception):
+    """A reserva da chave foi assumida por outra execução (esta passou de IDEMPOTENCY_LOCK_TIMEOUT)"""
+
+
+_execucoes = {}
+_execucoes_lock = threading.Lock()
+
+
+def _resposta_repetida(status, corpo, content_type):
+    response = current_app.response_class(corpo, status=status, content_type=content_type)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _em_uso(mensagem, status=409):
+    response = jsonify({'error': mensagem})
+    response.headers['Retry-After'] = '1'
+    return response, status
+
+
+def _chave_divergente():
+    return jsonify({'error': f'{CABECALHO} já usada com outro conteúdo'}), 422
+
+
+def limpar_vencidas():
+    """Remove as respostas guardadas há mais de IDEMPOTENCY_TTL segundos.
+
+    Roda pelo CLI (flask doacoes prune-idempotency-keys, agendado como o archive),
+    fora do caminho das requisições; uma chave vencida também é removida ao ser reusada.
+    """
+    limite = datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+    removidas = db.session.execute(
+        db.delete(RespostaIdempotente).where(RespostaIdempotente.created_at < limite)
+    ).rowcount
+    db.session.commit()
+    return removidas
+
+
+def _reservar(chave, rota, hash_requisicao):
+    """Reserva a chave no banco. Retorna ('executar', reservada_em), ('repetir', (status, corpo, content_type))
+    ou ('recusar', resposta) quando a chave diverge ou a espera pela outra execução se esgota.
+
+    O created_at da reserva identifica esta execução: só ela grava a resposta ou libera a linha.
+    """
+    config = current_app.config
+    prazo = time.monotonic() + config['IDEMPOTENCY_WAIT_TIMEOUT']
+    while True:
+        registro = db.session.get(RespostaIdempotente, (chave, rota))
+        agora = datetime.utcnow()
+
+        if registro is not None:
+            vencida = registro.created_at < agora - timedelta(seconds=config['IDEMPOTENCY_TTL'])
+            # Em andamento há tempo demais: o processo que reservou provavelmente caiu
+            abandonada = registro.status is None and (
+                registro.created_at < agora - timedelta(seconds=config['IDEMPOTENCY_LOCK_TIMEOUT'])
+            )
+            if vencida or abandonada:
+                db.session.delete(registro)
+                db.session.commit()
+                continue
+            if registro.hash_requisicao != hash_requisicao:
+                return 'recusar', _chave_divergente()
+            if registro.status is not None:
+                return 'repetir', (registro.status, registro.corpo, registro.content_type)
+
+            # Outro processo está executando a mesma chave: aguarda o resultado
+            db.session.rollback()  # Encerra a transação para enxergar o commit do outro processo
+            if time.monotonic() >= prazo:
+                return 'recusar', _em_uso('Requisição com esta Idempotency-Key ainda em andamento')
+            time.sleep(INTERVALO_ESPERA)
+            continue
+
+        # Sem microssegundos: o valor volta igual do banco e serve de identificador da reserva
+        reservada_em = agora.replace(microsecond=0)
+        db.session.add(RespostaIdempotente(
+            chave=chave, rota=rota, hash_requisicao=hash_requisicao, created_at=reservada_em
+        ))
+        try:
+            db.session.commit()
+            return 'executar', reservada_em
+        except IntegrityError:
+            db.session.rollback()  # Outro processo reservou antes: volta a consultar
+
+
+def _filtro_reserva(chave, rota, reservada_em):
+    return (
+        RespostaIdempotente.chave == chave,
+        RespostaIdempotente.rota == rota,
+        RespostaIdempotente.created_at == reservada_em,
+        RespostaIdempotente.status.is_(None),
+    )
+
+
+def _liberar(chave, rota, reservada_em):
+    """Remove a reserva de uma execução que falhou, para a próxima tentativa executar de novo"""
+    db.session.rollback()
+    db.session.execute(db.delete(RespostaIdempotente).where(*_filtro_reserva(chave, rota, reservada_em)))
+    db.session.commit()
+
+
+def nao_guardar(resposta):
+    """Marca uma resposta que depende do estado atual (ex.: livro sem estoque).
+
+    A resposta não é guardada e a chave é liberada: a repetição executa de novo,
+    em vez de receber a mesma recusa mesmo depois de o estoque voltar.
+    """
+    if g.get('idempotencia') is not None:
+        g.idempotencia_transitoria = True
+    return resposta
+
+
+def _guardavel(response):
+    """Só respostas 2xx e erros de validação (4xx que dependem apenas do corpo) são guardados"""
+    if response.is_streamed or g.pop('idempotencia_transitoria', False):
+        return False
+    status = response.status_code
+    return 200 <= status < 300 or (400 <= status < 500 and status not in STATUS_TRANSITORIOS)
+
+
+def guardar_resposta(resposta):
+    """Grava a resposta da requisição com Idempotency-Key na transação atual (o commit fica com quem chama).
+
+    A rota chama antes do commit que grava a doação: doação e resposta entram
+    no mesmo commit, e uma queda entre os dois não deixa a chave "em andamento"
+    para ser executada de novo. Sem Idempotency-Key, não faz nada.
+    """
+    reserva = g.get('idempotencia')
+    if reserva is None:
+        return
+    response = make_response(resposta)
+    guardada = (response.status_code, response.get_data(as_text=True), response.content_type)
+    atualizadas = db.session.execute(
+        db.update(RespostaIdempotente)
+        .where(*_filtro_reserva(*reserva))
+        .values(status=guardada[0], corpo=guardada[1], content_type=guardada[2])
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if atualizadas != 1:
+        raise ReservaPerdida(f'A reserva da {CABECALHO} expirou durante a execução')
+    g.idempotencia_guardada = guardada
+
+
+def idempotente(view):
+    """Suporte ao cabeçalho Idempotency-Key numa rota de criação.
+
+    A primeira requisição com a chave executa a rota e a resposta (2xx ou erro
+    de validação) fica guardada por IDEMPOTENCY_TTL segundos; as repetições
+    recebem a mesma resposta sem executar nada de novo. Erros do servidor e
+    recusas que dependem do estado atual (nao_guardar, STATUS_TRANSITORIOS)
+    liberam a chave. Rotas que gravam algo chamam
+    guardar_resposta antes do commit, para a resposta entrar na mesma transação. Repetições simultâneas no mesmo processo
+    aguardam a primeira execução em memória; entre processos, a linha reservada
+    na tabela faz o papel de trava.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        chave = request.headers.get(CABECALHO)
+        if chave is None:
+            return view(*args, **kwargs)
+        chave = chave.strip()
+        if not chave or len(chave) > TAMANHO_MAXIMO_CHAVE:
+            return jsonify({'error': f'{CABECALHO} deve ter entre 1 e {TAMANHO_MAXIMO_CHAVE} caracteres'}), 400
+
+        rota = request.endpoint
+        hash_requisicao = hashlib.sha256(request.get_data()).hexdigest()
+
+        # Repetições simultâneas neste processo esperam a primeira (sem consultar o banco)
+        with _execucoes_lock:
+            execucao = _execucoes.get((rota, chave))
+            lider = execucao is None
+            if lider:
+                execucao = _execucoes[(rota, chave)] = Execucao(hash_requisicao)
+
+        if not lider:
+            if execucao.hash_requisicao != hash_requisicao:
+                return _chave_divergente()
+            if not execucao.pronta.wait(current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']):
+                return _em_uso('Requisição com esta Idempotency-Key ainda em andamento')
+            if execucao.resposta is not None:
+                return _resposta_repetida(*execucao.resposta)
+            # Nada a repetir (a primeira falhou ou foi recusada): segue como uma nova tentativa
+            return wrapper(*args, **kwargs)
+
+        try:
+            acao, resultado = _reservar(chave, rota, hash_requisicao)
+            if acao == 'repetir':
+                execucao.resposta = resultado
+                return _resposta_repetida(*resultado)
+            if acao == 'recusar':
+                return resultado
+
+            reserva = (chave, rota, resultado)
+            g.idempotencia = reserva
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                _liberar(*reserva)
+                raise
+
+            guardada = g.pop('idempotencia_guardada', None)
+            if guardada is not None:
+                # Gravada pela rota no mesmo commit da doação
+                execucao.resposta = guardada
+                return response
+
+            if not _guardavel(response):
+                # Erros do servidor e recusas transitórias: a repetição executa de novo
+                _liberar(*reserva)
+                return response
+
+            # Respostas que não gravaram nada (erros de validação): guardadas à parte
+            try:
+                guardar_resposta(response)
+                db.session.commit()
+            except ReservaPerdida:
+                db.session.rollback()
+                return response
+            execucao.resposta = g.pop('idempotencia_guardada')
+            return response
+        finally:
+            g.pop('idempotencia', None)
+            g.pop('idempotencia_guardada', None)
+            g.pop('idempotencia_transitoria', None)
+            execucao.pronta.set()
+            with _execucoes_lock:
+                _execucoes.pop((rota, chave), None)
+
+    return wrapper
+
+
+@doacoes_cli.command('prune-idempotency-keys')
+def limpar_chaves_comando():
+    """Remove as respostas de Idempotency-Key mais antigas que IDEMPOTENCY_TTL."""
+    click.echo(f'{limpar_vencidas()} resposta(s) removida(s)')
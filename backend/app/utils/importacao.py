@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+from app import db
+from app.models import Livro
+from app.utils.cache import limpar_estatisticas
+from app.utils.eventos import marcar_catalogo_recarregado
+
+TAMANHO_LOTE = 1000
+
+
+def ler_livros_csv(texto):
+    """Lê um CSV com cabeçalho 'titulo,autor,quantidade'"""
+    return list(csv.DictReader(io.StringIO(texto)))
+
+
+def ler_livros_json(texto):
+    """Lê uma lista JSON de livros (ou um objeto com a chave 'livros')"""
+    dados = json.loads(texto)
+    if isinstance(dados, dict):
+        dados = dados.get('livros', [])
+    if not isinstance(dados, list):
+        raise ValueError('JSON deve ser uma lista de livros')
+    return dados
+
+
+def _validar(registro):
+    if not isinstance(registro, dict):
+        raise ValueError('Registro inválido')
+    titulo = str(registro.get('titulo') or '').strip()
+    autor = str(registro.get('autor') or '').strip()
+    if not titulo or not autor:
+        raise ValueError('Título e autor são obrigatórios')
+    try:
+        quantidade = int(registro.get('quantidade') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('Quantidade inválida')
+    if quantidade < 0:
+        raise ValueError('Quantidade não pode ser negativa')
+    return {'titulo': titulo, 'autor': autor, 'quantidade': quantidade}
+
+
+def _insert_upsert():
+    dialeto = db.engine.dialect.name
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f'Importação em lote não suportada para o banco {dialeto}')
+
+    stmt = insert(Livro)
+    return stmt.on_conflict_do_update(
+        index_elements=[Livro.titulo, Livro.autor],
+        set_={'quantidade': stmt.excluded.quantidade, 'updated_at': datetime.utcnow()}
+    )
+
+
+def importar_livros(registros, tamanho_lote=TAMANHO_LOTE):
+    """Insere ou atualiza livros em lotes com INSERT ... ON CONFLICT DO UPDATE.
+
+    Retorna um relatório por linha ('criado', 'atualizado', 'duplicado' ou
+    'erro') e um resumo com a contagem de cada status. O commit fica com quem chama.
+    """
+    relatorio = []
+    validos = {}
+
+    for linha, registro in enumerate(registros, 1):
+        try:
+            livro = _validar(registro)
+        except ValueError as e:
+            relatorio.append({'linha': linha, 'status': 'erro', 'erro': str(e)})
+            continue
+
+        item = {'linha': linha, 'titulo': livro['titulo'], 'autor': livro['autor'], 'status': None}
+        relatorio.append(item)
+        chave = (livro['titulo'], livro['autor'])
+
+        # O mesmo livro repetido no arquivo: vale a última ocorrência
+        anterior = validos.get(chave)
+        if anterior is not None:
+            anterior[0]['status'] = 'duplicado'
+        validos[chave] = (item, livro)
+
+    stmt = _insert_upsert()
+    pendentes = list(validos.items())
+
+    for inicio in range(0, len(pendentes), tamanho_lote):
+        lote = pendentes[inicio:inicio + tamanho_lote]
+
+        # Uma consulta por lote para distinguir criados de atualizados no relatório
+        existentes = {
+            tuple(row) for row in
+            db.session.query(Livro.titulo, Livro.autor)
+            .filter(db.tuple_(Livro.titulo, Livro.autor).in_([chave for chave, _ in lote]))
+        }
+
+        db.session.execute(stmt, [livro for _, (_, livro) in lote])
+
+        for chave, (item, _) in lote:
+            item['status'] = 'atualizado' if chave in existentes else 'criado'
+
+    if pendentes:
+        marcar_catalogo_recarregado()
+
+    resumo = {status: 0 for status in ('criado', 'atualizado', 'duplicado', 'erro')}
+    for item in relatorio:
+        resumo[item['status']] += 1
+
+    return relatorio, resumo
+
+
+def ler_arquivo_livros(nome, texto):
+    """Escolhe o leitor pelo nome do arquivo (.json ou .csv)"""
+    if nome.lower().endswith('.json'):
+        return ler_livros_json(texto)
+    return ler_livros_csv(texto)
+
+
+livros_cli = AppGroup('livros', help='Gerenciamento do catálogo de livros.')
+
+
+@livros_cli.command('import')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--lote', default=TAMANHO_LOTE, show_default=True, help='Livros por INSERT.')
+def importar_comando(arquivo, lote):
+    """Importa (ou atualiza) livros de um arquivo CSV ou JSON."""
+    with open(arquivo, encoding='utf-8-sig') as f:
+        registros = ler_arquivo_livros(os.path.basename(arquivo), f.read())
+
+    inicio = time.perf_counter()
+    relatorio, resumo = importar_livros(registros, tamanho_lote=lote)
+    db.session.commit()
+    limpar_estatisticas()
+
+    for item in relatorio:
+        if item['status'] == 'erro':
+            click.echo(f"Linha {item['linha']}: {item['erro']}", err=True)
+    click.echo(
+        f"{resumo['criado']} criado(s), {resumo['atualizado']} atualizado(s), "
+        f"{resumo['duplicado']} duplicado(s), {resumo['erro']} erro(s) "
+        f"em {time.perf_counter() - inicio:.2f}s"
+    )
@@ -0,0 +1,58 @@
+import sys
+import time
+from contextlib import contextmanager
+
+
+class PerfilInicializacao:
+    """Mede o tempo (e os módulos importados) de cada etapa do create_app.
+
+    Ativado com STARTUP_PROFILE=1; o relatório vai para o stderr ao fim do create_app.
+    """
+
+    def __init__(self, ativo):
+        self.ativo = ativo
+        self.etapas = []
+
+    def registrar(self, nome, duracao, modulos=0):
+        if self.ativo:
+            self.etapas.append((nome, duracao * 1000, modulos))
+
+    @contextmanager
+    def etapa(self, nome):
+        if not self.ativo:
+            yield
+            return
+        inicio = time.perf_counter()
+        modulos = len(sys.modules)
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio, len(sys.modules) - modulos)
+
+    def relatorio(self):
+        total = sum(ms for _, ms, _ in self.etapas)
+        linhas = [f"{'etapa':<28} {'ms':>8} {'módulos':>8}"]
+        for nome, ms, modulos in self.etapas:
+            linhas.append(f'{nome:<28} {ms:>8.1f} {modulos:>8}')
+        linhas.append(f"{'total':<28} {total:>8.1f}")
+        return '\n'.join(linhas)
+
+    def imprimir(self):
+        if self.ativo:
+            print(self.relatorio(), file=sys.stderr)
+
+
+def aquecer(app):
+    """Trabalho feito uma vez antes da primeira requisição.
+
+    Com preload_app no gunicorn roda no processo mestre, e os workers herdam o
+    resultado pelo fork em vez de repeti-lo na primeira requisição de cada um.
+    """
+    from sqlalchemy.orm import configure_mappers
+
+    from app import db
+
+    configure_mappers()
+    app.url_map.update()  # Compila o roteador do Werkzeug
+    with app.app_context():
+        db.engine  # Cria os engines (sem abrir conexões)
@@ -0,0 +1,61 @@
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, usa o json da biblioteca padrão
+    orjson = None
+
+
+def _padrao(obj):
+    # Datas em ISO 8601 (igual ao to_dict dos models), não no formato HTTP do Flask
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return _default(obj)
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """Provider JSON do app: orjson quando instalado, json da biblioteca padrão senão.
+
+    Nos dois casos datas e datetimes saem em ISO 8601, então as rotas podem
+    serializar linhas de `with_entities` direto, sem chamar isoformat() por item.
+    """
+
+    default = staticmethod(_padrao)
+    usar_orjson = orjson is not None
+
+    def dumps(self, obj, **kwargs):
+        # indent (modo debug) e opções do json padrão ficam com a implementação padrão
+        if not self.usar_orjson or set(kwargs) - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._opcoes()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if not self.usar_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        indentar = self.compact is False or (self.compact is None and self._app.debug)
+        if not self.usar_orjson or indentar:
+            return super().response(*args, **kwargs)
+        # Gera os bytes direto, sem passar por str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._opcoes() | orjson.OPT_APPEND_NEWLINE),
+            mimetype=self.mimetype
+        )
+
+    def _opcoes(self):
+        opcoes = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        return opcoes
+
+
+def init_json(app):
+    """Registra o provider JSON; JSON_SERIALIZER='json' força a biblioteca padrão"""
+    provider = ProvedorJSON(app)
+    provider.usar_orjson = orjson is not None and app.config.get('JSON_SERIALIZER') != 'json'
+    app.json = provider
@@ -0,0 +1,169 @@
+import ipaddress
+import logging
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from flask_jwt_extended import verify_jwt_in_request
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Limites (segundos) dos buckets do histograma de latência
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    """Métricas por rota acumuladas em memória (por processo)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # Nome -> função que retorna linhas extras para a exportação (ex.: controle de admissão)
+        self.coletores = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._latencias = {}   # (endpoint, método, status) -> [contagens..., soma, total]
+            self._rotas = {}       # (endpoint, método) -> [consultas, tempo_sql, bytes]
+            self.consultas_lentas = 0
+
+    def registrar_requisicao(self, endpoint, metodo, status, duracao, consultas, tempo_sql, tamanho):
+        with self._lock:
+            hist = self._latencias.setdefault(
+                (endpoint, metodo, status), [0] * len(self.buckets) + [0.0, 0]
+            )
+            for i, limite in enumerate(self.buckets):
+                if duracao <= limite:
+                    hist[i] += 1
+            hist[-2] += duracao
+            hist[-1] += 1
+
+            rota = self._rotas.setdefault((endpoint, metodo), [0, 0.0, 0])
+            rota[0] += consultas
+            rota[1] += tempo_sql
+            rota[2] += tamanho or 0
+
+    def registrar_consulta_lenta(self):
+        with self._lock:
+            self.consultas_lentas += 1
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus"""
+        linhas = [
+            '# HELP http_request_duration_seconds Latência das requisições por rota.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            for (endpoint, metodo, status), hist in sorted(self._latencias.items()):
+                labels = f'endpoint="{endpoint}",method="{metodo}",status="{status}"'
+                for limite, contagem in zip(self.buckets, hist):
+                    linhas.append(f'http_request_duration_seconds_bucket{{{labels},le="{limite}"}} {contagem}')
+                linhas.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist[-1]}')
+                linhas.append(f'http_request_duration_seconds_sum{{{labels}}} {hist[-2]:.6f}')
+                linhas.append(f'http_request_duration_seconds_count{{{labels}}} {hist[-1]}')
+
+            series = (
+                ('http_db_queries_total', 'Consultas SQL executadas por rota.', 0, '{}'),
+                ('http_db_query_seconds_total', 'Tempo gasto em SQL por rota.', 1, '{:.6f}'),
+                ('http_response_size_bytes_total', 'Bytes enviados nas respostas por rota.', 2, '{}'),
+            )
+            for nome, ajuda, indice, formato in series:
+                linhas.append(f'# HELP {nome} {ajuda}')
+                linhas.append(f'# TYPE {nome} counter')
+                for (endpoint, metodo), valores in sorted(self._rotas.items()):
+                    valor = formato.format(valores[indice])
+                    linhas.append(f'{nome}{{endpoint="{endpoint}",method="{metodo}"}} {valor}')
+
+            linhas.append('# HELP db_slow_queries_total Consultas acima de SLOW_QUERY_THRESHOLD_MS.')
+            linhas.append('# TYPE db_slow_queries_total counter')
+            linhas.append(f'db_slow_queries_total {self.consultas_lentas}')
+
+        for coletor in list(self.coletores.values()):
+            linhas.extend(coletor())
+        return '\n'.join(linhas) + '\n'
+
+
+metrics = Metrics()
+
+
+def _instrumentar_engine(engine, limite_lento):
+    @db.event.listens_for(engine, 'before_cursor_execute')
+    def antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('inicio_consulta', []).append(time.perf_counter())
+
+    @db.event.listens_for(engine, 'after_cursor_execute')
+    def depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info['inicio_consulta'].pop()
+
+        if has_request_context() and 'sql_consultas' in g:
+            g.sql_consultas += 1
+            g.sql_tempo += duracao
+
+        if duracao * 1000 >= limite_lento:
+            metrics.registrar_consulta_lenta()
+            logger.warning('Consulta lenta (%.1f ms): %s', duracao * 1000, statement)
+
+    @db.event.listens_for(engine, 'handle_error')
+    def consulta_com_erro(contexto):
+        # Sem o after_cursor_execute, descarta o início registrado pela consulta que falhou
+        if contexto.connection is not None and contexto.connection.info.get('inicio_consulta'):
+            contexto.connection.info['inicio_consulta'].pop()
+
+
+def init_metrics(app):
+    """Registra a instrumentação de latência/SQL e a rota /api/metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    limite_lento = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200)
+    with app.app_context():
+        for engine in db.engines.values():
+            _instrumentar_engine(engine, limite_lento)
+
+    @app.before_request
+    def iniciar_medicao():
+        g.inicio_requisicao = time.perf_counter()
+        g.sql_consultas = 0
+        g.sql_tempo = 0.0
+
+    @app.after_request
+    def registrar_medicao(response):
+        if 'inicio_requisicao' not in g:
+            return response
+
+        duracao = time.perf_counter() - g.inicio_requisicao
+        # Respostas em streaming não têm tamanho conhecido aqui
+        tamanho = None if response.is_streamed else response.calculate_content_length()
+
+        metrics.registrar_requisicao(
+            request.endpoint or 'desconhecido', request.method, response.status_code,
+            duracao, g.sql_consultas, g.sql_tempo, tamanho
+        )
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={duracao * 1000:.1f}, db;dur={g.sql_tempo * 1000:.1f};desc="{g.sql_consultas} queries"'
+        )
+        return response
+
+    # Sem token, só os endereços/redes em METRICS_ALLOWED_IPS (ex.: o Prometheus) leem as métricas
+    redes_liberadas = [
+        ipaddress.ip_network(rede.strip(), strict=False)
+        for rede in app.config.get('METRICS_ALLOWED_IPS', '').split(',') if rede.strip()
+    ]
+
+    def endereco_liberado():
+        try:
+            endereco = ipaddress.ip_address(request.remote_addr or '')
+        except ValueError:
+            return False
+        return any(endereco in rede for rede in redes_liberadas)
+
+    @app.route('/api/metrics')
+    def exportar_metricas():
+        # Latência e tráfego por rota não são públicos: fora da lista, exige o JWT de admin
+        if not endereco_liberado():
+            verify_jwt_in_request()
+        return Response(metrics.exportar(), mimetype='text/plain; version=0.0.4')
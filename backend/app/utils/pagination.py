@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação malformado ou adulterado"""
+
+
+def encode_cursor(*valores):
+    """Serializa a chave da última linha da página em um cursor opaco"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _converter(valor, tipo):
+    if tipo is datetime:
+        if not isinstance(valor, str):
+            raise CursorInvalido('Cursor inválido')
+        try:
+            return datetime.fromisoformat(valor)
+        except ValueError as e:
+            raise CursorInvalido('Cursor inválido') from e
+    # bool é subclasse de int: true/false não valem como id
+    if not isinstance(valor, tipo) or isinstance(valor, bool):
+        raise CursorInvalido('Cursor inválido')
+    return valor
+
+
+def decode_cursor(cursor, *tipos):
+    """Recupera os valores da chave gravados em um cursor.
+
+    Com `tipos`, exige um valor de cada tipo, na ordem (datetime é lido do
+    ISO 8601); um cursor bem formado com outros valores também é inválido.
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding)
+        valores = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido('Cursor inválido') from e
+
+    if not isinstance(valores, list):
+        raise CursorInvalido('Cursor inválido')
+    if tipos:
+        if len(valores) != len(tipos):
+            raise CursorInvalido('Cursor inválido')
+        valores = [_converter(valor, tipo) for valor, tipo in zip(valores, tipos)]
+    return valores
+
+
+def parse_limit(valor):
+    """Converte o parâmetro 'limit' respeitando o limite máximo"""
+    if valor in (None, ''):
+        return LIMITE_PADRAO
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError) as e:
+        raise CursorInvalido('Parâmetro limit inválido') from e
+    if limite <= 0:
+        raise CursorInvalido('Parâmetro limit inválido')
+    return min(limite, LIMITE_MAXIMO)
+
+
+def paginar(query, limite, chave):
+    """Executa a query buscando uma linha extra para saber se há próxima página.
+
+    `chave` recebe um item e devolve a tupla usada como cursor.
+    """
+    return cortar_pagina(query.limit(limite + 1).all(), limite, chave)
+
+
+def cortar_pagina(itens, limite, chave):
+    """Como paginar(), para uma lista já lida com até limite + 1 itens"""
+    next_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        next_cursor = encode_cursor(*chave(itens[-1]))
+    return itens, next_cursor
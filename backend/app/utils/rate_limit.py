@@ -0,0 +1,60 @@
+import math
+import threading
+import time
+
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+class MemoriaBucketStore:
+    """Token buckets em memória (por processo).
+
+    Para limitar entre vários workers, configure RATE_LIMIT_STORE com outra classe
+    que implemente `consumir(chave, capacidade, por_segundo)` sobre um armazenamento
+    compartilhado (ex.: Redis).
+    """
+
+    MAX_CHAVES = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, chave, capacidade, por_segundo):
+        """Retira um token do bucket; retorna (permitido, segundos até o próximo token)"""
+        agora = time.monotonic()
+        with self._lock:
+            tokens, ultimo = self._buckets.get(chave, (capacidade, agora))
+            tokens = min(capacidade, tokens + (agora - ultimo) * por_segundo)
+
+            if tokens >= 1:
+                self._buckets[chave] = (tokens - 1, agora)
+                permitido, espera = True, 0
+            else:
+                self._buckets[chave] = (tokens, agora)
+                permitido, espera = False, (1 - tokens) / por_segundo
+
+            if len(self._buckets) > self.MAX_CHAVES:
+                self._remover_cheios(agora, capacidade, por_segundo)
+
+        return permitido, espera
+
+    def _remover_cheios(self, agora, capacidade, por_segundo):
+        # Buckets já recarregados equivalem a buckets inexistentes
+        for chave, (tokens, ultimo) in list(self._buckets.items()):
+            if tokens + (agora - ultimo) * por_segundo >= capacidade:
+                del self._buckets[chave]
+
+
+def init_rate_limit(app):
+    store = app.config.get('RATE_LIMIT_STORE')
+    app.extensions['rate_limit_store'] = import_string(store)() if store else MemoriaBucketStore()
+
+
+def limitar(chave, por_minuto):
+    """Consome um token de `chave`; retorna None se permitido ou o Retry-After em segundos"""
+    if not por_minuto:
+        return None
+    store = current_app.extensions['rate_limit_store']
+    permitido, espera = store.consumir(chave, por_minuto, por_minuto / 60)
+    return None if permitido else max(1, math.ceil(espera))
@@ -0,0 +1,134 @@
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+logger = logging.getLogger(__name__)
+
+# Cookie e cabeçalho com o momento (epoch) da última escrita do cliente
+COOKIE_ESCRITA = 'ultima_escrita'
+CABECALHO_ESCRITA = 'X-Last-Write'
+
+_lag_lock = threading.Lock()
+_lag_cache = {'valor': None, 'verificado_em': 0.0}
+
+SQL_LAG_POSTGRESQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def usar_replica(view):
+    """Permite que as leituras da rota usem a réplica (quando configurada)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.usar_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _lag_replica(engine):
+    """Atraso de replicação em segundos (consultado no máximo a cada REPLICA_LAG_CHECK_INTERVAL)"""
+    intervalo = current_app.config['REPLICA_LAG_CHECK_INTERVAL']
+    agora = time.monotonic()
+    with _lag_lock:
+        if agora - _lag_cache['verificado_em'] < intervalo:
+            return _lag_cache['valor']
+        _lag_cache['verificado_em'] = agora
+
+    if engine.dialect.name == 'postgresql':
+        try:
+            with engine.connect() as conn:
+                lag = float(conn.execute(sa.text(SQL_LAG_POSTGRESQL)).scalar() or 0)
+        except sa.exc.SQLAlchemyError:
+            logger.exception('Não foi possível consultar o atraso da réplica')
+            lag = None  # Réplica indisponível: usa o primário até a próxima verificação
+    else:
+        lag = 0.0
+
+    with _lag_lock:
+        _lag_cache['valor'] = lag
+    return lag
+
+
+def _escreveu_recentemente():
+    """True se o cliente desta requisição gravou algo há menos de REPLICA_READ_YOUR_WRITES segundos.
+
+    O momento vem do cookie ou do cabeçalho X-Last-Write devolvidos nas respostas
+    das escritas; valores no futuro além da janela são ignorados.
+    """
+    valor = request.headers.get(CABECALHO_ESCRITA) or request.cookies.get(COOKIE_ESCRITA)
+    if not valor:
+        return False
+    try:
+        escrita_em = float(valor)
+    except ValueError:
+        return False
+    janela = current_app.config['REPLICA_READ_YOUR_WRITES']
+    return abs(time.time() - escrita_em) < janela
+
+
+class RoutingSession(Session):
+    """Sessão que envia os SELECTs das rotas marcadas com @usar_replica para a réplica.
+
+    Escritas, o flush e qualquer leitura depois de uma escrita na mesma requisição
+    continuam no primário. Depois de um commit com escrita, o mesmo cliente também
+    lê do primário por REPLICA_READ_YOUR_WRITES segundos (ler as próprias escritas);
+    os demais clientes continuam na réplica.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._pode_usar_replica(clause):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _pode_usar_replica(self, clause):
+        if self._flushing or isinstance(clause, (sa.sql.Insert, sa.sql.Update, sa.sql.Delete)):
+            self.info['primario'] = True
+            return False
+
+        if self.info.get('primario') or not isinstance(clause, sa.sql.Select):
+            return False
+        if not has_request_context() or not g.get('usar_replica'):
+            return False
+
+        engines = self._db.engines
+        if 'replica' not in engines:
+            return False
+
+        if _escreveu_recentemente():
+            return False
+
+        lag = _lag_replica(engines['replica'])
+        return lag is not None and lag <= current_app.config['REPLICA_MAX_LAG']
+
+
+@sa.event.listens_for(RoutingSession, 'after_commit')
+def _registrar_escrita(session):
+    # Só escritas feitas por requisições: o worker de emails e o CLI não afetam ninguém
+    if session.info.get('primario') and has_request_context():
+        g.escrita_em = time.time()
+
+
+def init_replica(app):
+    """Devolve ao cliente o momento da sua última escrita (cookie e cabeçalho X-Last-Write)"""
+    if not app.config.get('SQLALCHEMY_BINDS', {}).get('replica'):
+        return
+
+    @app.after_request
+    def marcar_escrita(response):
+        escrita_em = g.pop('escrita_em', None)
+        if escrita_em is not None:
+            valor = f'{escrita_em:.3f}'
+            response.headers[CABECALHO_ESCRITA] = valor
+            response.set_cookie(COOKIE_ESCRITA, valor, max_age=max(1, math.ceil(app.config['REPLICA_READ_YOUR_WRITES'])),
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,235 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+
+from app import db
+from app.models import Doacao, DoacaoArquivada, Livro, ResumoDoacoesDia, ResumoDoadoresDia
+from app.utils.cache import limpar_estatisticas
+
+GRANULARIDADES = ('day', 'week', 'month')
+
+
+class PeriodoInvalido(ValueError):
+    """Período da série temporal longo demais ou fora das datas suportadas"""
+
+
+def _dia(doacao):
+    # created_at só é preenchido no flush; antes disso a doação é de hoje
+    return (_valor(doacao, 'created_at') or datetime.utcnow()).date()
+
+
+def _valor(doacao, campo):
+    return doacao[campo] if isinstance(doacao, dict) else getattr(doacao, campo)
+
+
+def _upsert(model, chaves, linhas):
+    """INSERT ... ON CONFLICT somando 'total' (e atualizando o nome do doador)"""
+    dialeto = db.engine.dialect.name
+    if dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is None:
+        # Outros bancos: UPDATE e, se a linha ainda não existir, INSERT
+        for linha in linhas:
+            filtro = [getattr(model, chave) == linha[chave] for chave in chaves]
+            valores = {'total': model.total + linha['total']}
+            if 'nome' in linha:
+                valores['nome'] = linha['nome']
+            if db.session.execute(db.update(model).where(*filtro).values(**valores)).rowcount == 0:
+                db.session.execute(db.insert(model).values(**linha))
+        return
+
+    stmt = insert(model)
+    atualizar = {'total': model.total + stmt.excluded.total}
+    if 'nome' in model.__table__.c:
+        atualizar['nome'] = stmt.excluded.nome
+    db.session.execute(stmt.on_conflict_do_update(index_elements=chaves, set_=atualizar), linhas)
+
+
+def atualizar_resumos(doacoes, sinal=1):
+    """Soma (sinal=1) ou subtrai (sinal=-1) doações dos resumos diários.
+
+    Roda na transação de quem chama, junto com a escrita das doações. As linhas
+    são gravadas em ordem de chave para evitar deadlocks entre transações.
+    """
+    por_item = Counter()
+    por_doador = Counter()
+    nomes = {}
+    for doacao in doacoes:
+        dia = _dia(doacao)
+        por_item[(dia, _valor(doacao, 'tipo'), _valor(doacao, 'livro_id') or 0)] += sinal
+        chave = (dia, _valor(doacao, 'email'))
+        por_doador[chave] += sinal
+        nomes[chave] = _valor(doacao, 'nome')
+
+    if por_item:
+        _upsert(ResumoDoacoesDia, ['dia', 'tipo', 'livro_id'], [
+            {'dia': dia, 'tipo': tipo, 'livro_id': livro_id, 'total': total}
+            for (dia, tipo, livro_id), total in sorted(por_item.items())
+        ])
+    if por_doador:
+        _upsert(ResumoDoadoresDia, ['dia', 'email'], [
+            {'dia': dia, 'email': email, 'nome': nomes[(dia, email)], 'total': total}
+            for (dia, email), total in sorted(por_doador.items())
+        ])
+
+
+def reconstruir_resumos():
+    """Recalcula os resumos a partir das doações (incluindo as arquivadas). O commit fica com quem chama."""
+    colunas = ('created_at', 'tipo', 'livro_id', 'email', 'nome')
+    doacoes = db.union_all(
+        db.select(*[getattr(Doacao, col) for col in colunas]),
+        db.select(*[getattr(DoacaoArquivada, col) for col in colunas])
+        .where(DoacaoArquivada.excluida_em.is_(None))
+    ).subquery()
+    dia = db.func.date(doacoes.c.created_at)
+    com_data = doacoes.c.created_at.isnot(None)
+
+    db.session.execute(db.delete(ResumoDoacoesDia))
+    db.session.execute(db.delete(ResumoDoadoresDia))
+
+    livro_id = db.func.coalesce(doacoes.c.livro_id, 0)
+    db.session.execute(db.insert(ResumoDoacoesDia).from_select(
+        ['dia', 'tipo', 'livro_id', 'total'],
+        db.select(dia, doacoes.c.tipo, livro_id, db.func.count())
+        .where(com_data).group_by(dia, doacoes.c.tipo, livro_id)
+    ))
+    db.session.execute(db.insert(ResumoDoadoresDia).from_select(
+        ['dia', 'email', 'nome', 'total'],
+        db.select(dia, doacoes.c.email, db.func.max(doacoes.c.nome), db.func.count())
+        .where(com_data).group_by(dia, doacoes.c.email)
+    ))
+
+
+def _inicio_periodo(dia, granularidade):
+    if granularidade == 'week':
+        return dia - timedelta(days=dia.weekday())  # Semanas começam na segunda-feira
+    if granularidade == 'month':
+        return dia.replace(day=1)
+    return dia
+
+
+def _proximo_periodo(periodo, granularidade):
+    if granularidade == 'week':
+        return periodo + timedelta(days=7)
+    if granularidade == 'month':
+        return (periodo + timedelta(days=32)).replace(day=1)
+    return periodo + timedelta(days=1)
+
+
+def _contar_periodos(primeiro, ultimo, granularidade):
+    if granularidade == 'month':
+        return (ultimo.year - primeiro.year) * 12 + ultimo.month - primeiro.month + 1
+    dias = (ultimo - primeiro).days
+    return (dias // 7 if granularidade == 'week' else dias) + 1
+
+
+def serie_temporal(granularidade, inicio=None, fim=None, maximo=None):
+    """Doações por período (dia, semana ou mês) e tipo, entre as datas inclusivas.
+
+    Lança PeriodoInvalido se a série tiver mais de `maximo` períodos (contando
+    os vazios, preenchidos até as datas pedidas ou as doações mais antiga/recente).
+    """
+    query = db.select(
+        ResumoDoacoesDia.dia, ResumoDoacoesDia.tipo, db.func.sum(ResumoDoacoesDia.total)
+    ).group_by(ResumoDoacoesDia.dia, ResumoDoacoesDia.tipo)
+    if inicio:
+        query = query.where(ResumoDoacoesDia.dia >= inicio)
+    if fim:
+        query = query.where(ResumoDoacoesDia.dia <= fim)
+
+    totais = {}
+    for dia, tipo, total in db.session.execute(query):
+        periodo = _inicio_periodo(dia, granularidade)
+        contagem = totais.setdefault(periodo, Counter())
+        contagem[tipo] += total
+
+    if not totais and not (inicio and fim):
+        return []
+
+    # Preenche os períodos sem doações para o gráfico não ter buracos
+    try:
+        periodo = _inicio_periodo(inicio or min(totais), granularidade)
+        ultimo = _inicio_periodo(fim or max(totais), granularidade)
+    except OverflowError as e:
+        raise PeriodoInvalido('Período fora das datas suportadas') from e
+    quantidade = _contar_periodos(periodo, ultimo, granularidade)
+    if maximo and quantidade > maximo:
+        raise PeriodoInvalido(f'Período longo demais: no máximo {maximo} períodos de "{granularidade}"')
+
+    serie = []
+    for indice in range(quantidade):
+        if indice:
+            periodo = _proximo_periodo(periodo, granularidade)
+        contagem = totais.get(periodo, Counter())
+        serie.append({
+            'periodo': periodo.isoformat(),
+            'total': sum(contagem.values()),
+            'livros': contagem['livro'],
+            'jogos': contagem['jogo']
+        })
+    return serie
+
+
+def top_livros(limite, inicio=None, fim=None):
+    """Livros mais doados no período"""
+    total = db.func.sum(ResumoDoacoesDia.total).label('total')
+    query = (
+        db.select(ResumoDoacoesDia.livro_id, Livro.titulo, Livro.autor, total)
+        .outerjoin(Livro, Livro.id == ResumoDoacoesDia.livro_id)
+        .where(ResumoDoacoesDia.livro_id != 0)
+        .group_by(ResumoDoacoesDia.livro_id, Livro.titulo, Livro.autor)
+        .having(total > 0)
+        .order_by(total.desc(), ResumoDoacoesDia.livro_id)
+        .limit(limite)
+    )
+    if inicio:
+        query = query.where(ResumoDoacoesDia.dia >= inicio)
+    if fim:
+        query = query.where(ResumoDoacoesDia.dia <= fim)
+
+    return [
+        {'livro_id': row.livro_id, 'titulo': row.titulo, 'autor': row.autor, 'total': int(row.total)}
+        for row in db.session.execute(query)
+    ]
+
+
+def top_doadores(limite, inicio=None, fim=None):
+    """Doadores com mais doações no período"""
+    total = db.func.sum(ResumoDoadoresDia.total).label('total')
+    query = (
+        db.select(ResumoDoadoresDia.email, db.func.max(ResumoDoadoresDia.nome).label('nome'), total)
+        .group_by(ResumoDoadoresDia.email)
+        .having(total > 0)
+        .order_by(total.desc(), ResumoDoadoresDia.email)
+        .limit(limite)
+    )
+    if inicio:
+        query = query.where(ResumoDoadoresDia.dia >= inicio)
+    if fim:
+        query = query.where(ResumoDoadoresDia.dia <= fim)
+
+    return [
+        {'email': row.email, 'nome': row.nome, 'total': int(row.total)}
+        for row in db.session.execute(query)
+    ]
+
+
+stats_cli = AppGroup('stats', help='Resumos pré-calculados das estatísticas.')
+
+
+@stats_cli.command('rebuild')
+def reconstruir_comando():
+    """Recalcula os resumos diários de doações a partir da tabela de doações."""
+    inicio = time.perf_counter()
+    reconstruir_resumos()
+    db.session.commit()
+    limpar_estatisticas()
+    click.echo(f'Resumos recalculados em {time.perf_counter() - inicio:.2f}s')
@@ -0,0 +1,165 @@
+import re
+from flask import current_app
+from app import db
+
+# Configuração textual do PostgreSQL: português sem acentos
+PG_TS_CONFIG = 'portuguese_unaccent'
+
+# Colunas indexadas por tabela, com o peso usado no ranking do PostgreSQL
+CAMPOS_BUSCA = {
+    'livros': [('titulo', 'A'), ('autor', 'B')],
+    'doacoes': [('nome', 'A'), ('item', 'A'), ('email', 'B')],
+    'doacoes_arquivadas': [('nome', 'A'), ('item', 'A'), ('email', 'B')],
+}
+
+_PALAVRA = re.compile(r'\w+', re.UNICODE)
+
+
+def _ddl_postgresql(tabela):
+    campos = CAMPOS_BUSCA[tabela]
+    vetor = ' || '.join(
+        f"setweight(to_tsvector('{PG_TS_CONFIG}', coalesce(NEW.{col}, '')), '{peso}')"
+        for col, peso in campos
+    )
+    colunas = ', '.join(col for col, _ in campos)
+    return [
+        f"ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS search_vector tsvector",
+        f"""
+        CREATE OR REPLACE FUNCTION {tabela}_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {vetor};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {tabela}_search_vector_trg ON {tabela}",
+        f"""
+        CREATE TRIGGER {tabela}_search_vector_trg
+        BEFORE INSERT OR UPDATE OF {colunas} ON {tabela}
+        FOR EACH ROW EXECUTE FUNCTION {tabela}_search_vector_update()
+        """,
+        # Força o trigger a preencher as linhas já existentes
+        f"UPDATE {tabela} SET {campos[0][0]} = {campos[0][0]}",
+        f"CREATE INDEX IF NOT EXISTS ix_{tabela}_search_vector ON {tabela} USING GIN (search_vector)",
+    ]
+
+
+def _ddl_sqlite(tabela):
+    colunas = [col for col, _ in CAMPOS_BUSCA[tabela]]
+    cols = ', '.join(colunas)
+    new_vals = ', '.join(f'new.{c}' for c in colunas)
+    old_vals = ', '.join(f'old.{c}' for c in colunas)
+    fts = f'{tabela}_fts'
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{tabela}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabela} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals});
+        END
+        """,
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def ddl_busca(dialeto, tabela):
+    """Comandos que criam o índice de busca textual de uma tabela"""
+    if dialeto == 'postgresql':
+        return _ddl_postgresql(tabela)
+    if dialeto == 'sqlite':
+        return _ddl_sqlite(tabela)
+    return []
+
+
+DDL_CONFIG_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{PG_TS_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {PG_TS_CONFIG} (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION {PG_TS_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+]
+
+
+def registrar_ddl_busca(*tabelas):
+    """Cria os índices de busca junto com as tabelas em db.create_all()"""
+    for tabela in tabelas:
+        if tabela.name == 'livros':
+            for stmt in DDL_CONFIG_POSTGRESQL:
+                db.event.listen(tabela, 'after_create', db.DDL(stmt).execute_if(dialect='postgresql'))
+        for dialeto in ('postgresql', 'sqlite'):
+            for stmt in ddl_busca(dialeto, tabela.name):
+                db.event.listen(tabela, 'after_create', db.DDL(stmt).execute_if(dialect=dialeto))
+
+
+def _backend_busca():
+    backend = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if backend != 'auto':
+        return backend
+    dialeto = db.engine.dialect.name
+    if dialeto == 'postgresql':
+        return 'tsvector'
+    if dialeto == 'sqlite':
+        return 'fts5'
+    return 'ilike'
+
+
+def aplicar_busca(query, model, termo):
+    """Filtra a query pelo termo usando o índice textual disponível.
+
+    Retorna a query filtrada e a expressão de ordenação por relevância
+    (ou None quando o backend não calcula ranking).
+    """
+    tabela = model.__tablename__
+    colunas = [getattr(model, col) for col, _ in CAMPOS_BUSCA[tabela]]
+    palavras = _PALAVRA.findall(termo)
+    backend = _backend_busca()
+
+    if palavras and backend == 'tsvector':
+        # Cada palavra vira um prefixo para atender a busca enquanto se digita
+        tsquery = db.func.to_tsquery(PG_TS_CONFIG, ' & '.join(f'{p}:*' for p in palavras))
+        vetor = db.literal_column(f'{tabela}.search_vector')
+        query = query.filter(vetor.op('@@')(tsquery))
+        return query, db.func.ts_rank(vetor, tsquery).desc()
+
+    if palavras and backend == 'fts5':
+        fts = db.table(f'{tabela}_fts', db.column('rowid'), db.column('rank'), db.column(f'{tabela}_fts'))
+        match = ' '.join(f'"{p}"*' for p in palavras)
+        query = query.join(fts, fts.c.rowid == model.id).filter(fts.c[f'{tabela}_fts'].op('MATCH')(match))
+        # No FTS5 o 'rank' (bm25) é menor para os resultados mais relevantes
+        return query, fts.c.rank.asc()
+
+    query = query.filter(db.or_(*[col.ilike(f'%{termo}%') for col in colunas]))
+    return query, None
+
+
+def ignorar_objetos_busca(objeto, nome, tipo, reflected, compare_to):
+    """Evita que o autogenerate do Alembic remova os objetos de busca criados via DDL"""
+    if tipo == 'column' and nome == 'search_vector':
+        return False
+    if tipo == 'table' and nome and (nome.endswith('_fts') or '_fts_' in nome):
+        return False
+    if tipo == 'index' and nome and nome.endswith('_search_vector'):
+        return False
+    return True
@@ -0,0 +1,47 @@
+import click
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Admin, Livro
+from app.utils.cache import limpar_estatisticas
+from app.utils.importacao import importar_livros
+
+LIVROS_EXEMPLO = [
+    {'titulo': 'O Alquimista', 'autor': 'Paulo Coelho', 'quantidade': 5},
+    {'titulo': '1984', 'autor': 'George Orwell', 'quantidade': 3},
+    {'titulo': 'Dom Casmurro', 'autor': 'Machado de Assis', 'quantidade': 2},
+    {'titulo': 'O Pequeno Príncipe', 'autor': 'Antoine de Saint-Exupéry', 'quantidade': 4},
+    {'titulo': 'Clean Code', 'autor': 'Robert C. Martin', 'quantidade': 1},
+    {'titulo': 'Harry Potter e a Pedra Filosofal', 'autor': 'J.K. Rowling', 'quantidade': 0},
+    {'titulo': 'O Hobbit', 'autor': 'J.R.R. Tolkien', 'quantidade': 3},
+    {'titulo': 'Sapiens', 'autor': 'Yuval Noah Harari', 'quantidade': 2},
+]
+
+
+def popular_banco(admin_senha='123456', criar_tabelas=True):
+    """Cria as tabelas, o admin padrão e os livros de exemplo (se ainda não existirem)"""
+    if criar_tabelas:
+        db.create_all()
+
+    # Criar admin padrão se não existir
+    if db.session.query(Admin.id).filter_by(username='admin').first() is None:
+        admin = Admin(username='admin')
+        admin.set_password(admin_senha)
+        db.session.add(admin)
+
+    # Adicionar livros de exemplo se não existirem
+    if db.session.query(Livro.id).first() is None:
+        importar_livros(LIVROS_EXEMPLO)
+
+    db.session.commit()
+    limpar_estatisticas()
+
+
+@click.command('seed')
+@click.option('--admin-senha', default='123456', show_default=True, help='Senha do admin padrão, se for criado.')
+@click.option('--sem-create-all', is_flag=True, help='Não cria as tabelas (banco gerenciado por flask db upgrade).')
+@with_appcontext
+def seed_comando(admin_senha, sem_create_all):
+    """Inicializa o banco com o admin padrão e livros de exemplo."""
+    popular_banco(admin_senha, criar_tabelas=not sem_create_all)
+    click.echo('Banco de dados inicializado!')
@@ -0,0 +1,95 @@
+import hashlib
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.utils.cache import TTLCache
+
+
+class HashIndisponivel(Exception):
+    """Todas as vagas de verificação de senha estão ocupadas"""
+
+
+class VerificadorSenhas:
+    """Executor limitado para o hash de senhas (PBKDF2/scrypt consomem CPU).
+
+    No máximo `max_workers` verificações rodam ao mesmo tempo e até `fila`
+    aguardam; acima disso a requisição é recusada em vez de prender o worker.
+    """
+
+    def __init__(self, max_workers, fila, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hash-senha')
+        self._vagas = threading.BoundedSemaphore(max_workers + fila)
+
+    def _executar(self, funcao, *args):
+        if not self._vagas.acquire(blocking=False):
+            raise HashIndisponivel()
+        try:
+            futuro = self._executor.submit(funcao, *args)
+        except BaseException:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return futuro.result(timeout=self.timeout)
+
+    def verificar(self, password_hash, senha):
+        return self._executar(check_password_hash, password_hash, senha)
+
+    def gerar(self, senha, metodo):
+        return self._executar(generate_password_hash, senha, metodo)
+
+
+def init_senhas(app):
+    app.extensions['verificador_senhas'] = VerificadorSenhas(
+        app.config['LOGIN_HASH_CONCURRENCY'],
+        app.config['LOGIN_HASH_QUEUE'],
+        app.config['LOGIN_HASH_TIMEOUT']
+    )
+    app.extensions['credenciais_cache'] = TTLCache(app.config['LOGIN_CACHE_TTL'])
+
+
+def _chave_credencial(admin, senha):
+    # A chave depende do hash armazenado: trocar a senha invalida o cache automaticamente
+    segredo = current_app.config['JWT_SECRET_KEY'].encode('utf-8')
+    dados = f'{admin.username}\0{senha}\0{admin.password_hash}'.encode('utf-8')
+    return hmac.new(segredo, dados, hashlib.sha256).hexdigest()
+
+
+def verificar_credenciais(admin, senha):
+    """Confere a senha do admin usando o cache de credenciais e o executor limitado"""
+    cache = current_app.extensions['credenciais_cache']
+    usar_cache = current_app.config['LOGIN_CACHE_TTL'] > 0
+    chave = _chave_credencial(admin, senha) if usar_cache else None
+
+    if usar_cache and cache.get(chave):
+        return True
+
+    valido = current_app.extensions['verificador_senhas'].verificar(admin.password_hash, senha)
+
+    if valido and usar_cache:
+        cache.set(chave, True)
+    return valido
+
+
+def precisa_rehash(password_hash):
+    """True se o hash não usa o método configurado em PASSWORD_HASH_METHOD.
+
+    O prefixo guardado traz os parâmetros completos ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'),
+    mesmo quando o método configurado omite alguns ('scrypt', 'pbkdf2:sha256'): só os campos
+    presentes no método são comparados.
+    """
+    metodo = current_app.config.get('PASSWORD_HASH_METHOD')
+    if not metodo:
+        return False
+    campos = metodo.split(':')
+    return password_hash.split('$', 1)[0].split(':')[:len(campos)] != campos
+
+
+def gerar_hash(senha):
+    """Hash da senha com PASSWORD_HASH_METHOD, calculado no executor limitado"""
+    metodo = current_app.config.get('PASSWORD_HASH_METHOD') or 'pbkdf2'
+    return current_app.extensions['verificador_senhas'].gerar(senha, metodo)
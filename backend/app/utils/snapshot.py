@@ -0,0 +1,334 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só a variante .gz
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Fora do Unix, sem trava entre processos
+    fcntl = None
+
+import click
+import sqlalchemy as sa
+from flask import current_app, has_app_context, request
+
+from app import db
+from app.models import Livro
+from app.utils.http_cache import aplicar_cache_headers, calcular_etag
+from app.utils.importacao import livros_cli
+from app.utils.replica import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO = 'catalog.json'
+# Versão, ETag e data de geração do snapshot (lido antes de servir os arquivos)
+ARQUIVO_META = 'catalog.meta.json'
+# Tocado a cada commit que cria, edita ou remove livros: marca o snapshot como desatualizado
+ARQUIVO_SUJO = 'catalog.dirty'
+# Tocado a cada commit que só muda estoque: o snapshot é regerado, mas sem pressa
+ARQUIVO_ESTOQUE = 'catalog.stock'
+ARQUIVO_TRAVA = 'catalog.lock'
+# Variantes pré-comprimidas, na ordem de preferência
+VARIANTES = (('br', '.br'), ('gzip', '.gz'))
+# Qualidade 11 do brotli leva dezenas de segundos num catálogo grande; 5 fica perto do gzip em tempo
+QUALIDADE_BROTLI = 5
+NIVEL_GZIP = 6
+
+
+def diretorio(app):
+    return app.config.get('CATALOG_SNAPSHOT_DIR')
+
+
+def _escrever_atomico(caminho, dados):
+    """Grava num temporário do mesmo diretório e troca com os.replace: quem lê vê o arquivo antigo ou o novo"""
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dados)
+        os.chmod(temporario, 0o644)  # Legível por um servidor estático (nginx) na frente
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def _mtime(caminho):
+    try:
+        return os.stat(caminho).st_mtime
+    except OSError:
+        return 0
+
+
+def _ler_meta(pasta):
+    try:
+        with open(os.path.join(pasta, ARQUIVO_META), 'rb') as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def gerar_snapshot(app, forcar=False):
+    """Lê o catálogo e grava catalog.json (+ .br/.gz) e os metadados no diretório configurado.
+
+    O corpo é o mesmo do GET /api/livros sem parâmetros, e o ETag também. Sem
+    `forcar`, não faz nada se o snapshot atual começou a ser gerado depois da
+    última alteração marcada (outro worker já incluiu as mudanças).
+    """
+    pasta = diretorio(app)
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, ARQUIVO_TRAVA), 'a') as trava:
+        # Um worker por vez: evita que um snapshot mais antigo sobrescreva um mais novo
+        if fcntl is not None:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+        if not forcar:
+            atual = _ler_meta(pasta)
+            alterado_em = max(_mtime(os.path.join(pasta, ARQUIVO_SUJO)), _mtime(os.path.join(pasta, ARQUIVO_ESTOQUE)))
+            if (atual is not None and atual['gerado_em'] >= alterado_em
+                    and os.path.exists(os.path.join(pasta, ARQUIVO))):
+                return atual
+        gerado_em = time.time()
+        with app.app_context():
+            livros = [
+                linha._asdict() for linha in
+                db.session.query(*Livro.colunas_dict()).order_by(Livro.titulo, Livro.id)
+            ]
+            corpo = app.json.dumps({'success': True, 'livros': livros}).encode('utf-8') + b'\n'
+
+        ultima_atualizacao = max((l['updated_at'] for l in livros if l['updated_at']), default=None)
+        meta = {
+            'etag': calcular_etag(len(livros), ultima_atualizacao, ''),
+            'last_modified': ultima_atualizacao.isoformat() if ultima_atualizacao else None,
+            'gerado_em': gerado_em,
+            'total': len(livros),
+        }
+
+        _escrever_atomico(os.path.join(pasta, ARQUIVO), corpo)
+        _escrever_atomico(os.path.join(pasta, ARQUIVO + '.gz'), gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0))
+        if brotli is not None:
+            _escrever_atomico(os.path.join(pasta, ARQUIVO + '.br'), brotli.compress(corpo, quality=QUALIDADE_BROTLI))
+        # Os metadados por último: só apontam para um snapshot já completo
+        _escrever_atomico(os.path.join(pasta, ARQUIVO_META), json.dumps(meta).encode('utf-8'))
+    return meta
+
+
+class PublicadorSnapshot:
+    """Regenera o snapshot do catálogo após commits que alteram livros.
+
+    Com debounce: o primeiro commit agenda a geração para daqui a `atraso`
+    segundos (CATALOG_SNAPSHOT_DEBOUNCE, ou CATALOG_SNAPSHOT_STOCK_INTERVAL
+    quando só o estoque mudou) e os commits seguintes até lá entram na mesma
+    geração. Um pedido com atraso menor antecipa a geração já agendada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer = None
+        self._vence_em = None
+        self._pendente = None  # Atraso pedido durante uma geração em andamento
+        self._gerando = False
+        self._pid = None
+
+    def agendar(self, app, atraso=None):
+        if atraso is None:
+            atraso = app.config['CATALOG_SNAPSHOT_DEBOUNCE']
+        with self._lock:
+            if self._pid != os.getpid():
+                # Após um fork, o timer do processo pai não existe no filho
+                self._pid = os.getpid()
+                self._timer = None
+                self._gerando = False
+            if self._gerando:
+                # Gera de novo quando a geração atual terminar
+                self._pendente = atraso if self._pendente is None else min(self._pendente, atraso)
+                return
+            vence_em = time.monotonic() + atraso
+            if self._timer is not None:
+                if vence_em >= self._vence_em:
+                    return
+                self._timer.cancel()
+            self._vence_em = vence_em
+            self._timer = threading.Timer(atraso, self._executar, args=(app,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _executar(self, app):
+        with self._lock:
+            if threading.current_thread() is not self._timer:
+                return  # Timer substituído por um mais próximo
+            self._timer = None
+            self._gerando = True
+            self._pendente = None
+        try:
+            gerar_snapshot(app)
+        except Exception:
+            logger.exception('Falha ao gerar o snapshot do catálogo')
+        finally:
+            with self._lock:
+                self._gerando = False
+                pendente = self._pendente
+        if pendente is not None:
+            self.agendar(app, pendente)
+
+
+publicador_snapshot = PublicadorSnapshot()
+
+
+def marcar_sujo(app, arquivo=ARQUIVO_SUJO):
+    """Registra (para todos os workers) que o catálogo mudou depois do último snapshot"""
+    pasta = diretorio(app)
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        with open(os.path.join(pasta, arquivo), 'a'):
+            pass
+        os.utime(os.path.join(pasta, arquivo))
+    except OSError:
+        logger.exception('Não foi possível marcar o snapshot do catálogo como desatualizado')
+
+
+class LeitorSnapshot:
+    """Serve o snapshot do disco, guardando em memória os bytes já lidos (por processo)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chave = None
+        self._meta = None
+        self._arquivos = {}
+
+    def _carregar(self, pasta, chave):
+        with open(os.path.join(pasta, ARQUIVO_META), 'rb') as f:
+            meta = json.loads(f.read())
+        arquivos = {}
+        for codificacao, extensao in ((None, ''),) + VARIANTES:
+            try:
+                with open(os.path.join(pasta, ARQUIVO + extensao), 'rb') as f:
+                    arquivos[codificacao] = f.read()
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            self._chave = chave
+            self._meta = meta
+            self._arquivos = arquivos
+
+    def resposta(self, app):
+        """Resposta com o snapshot, ou None se ele não existir ou estiver desatualizado"""
+        pasta = diretorio(app)
+        try:
+            estado = os.stat(os.path.join(pasta, ARQUIVO_META))
+        except OSError:
+            return None
+        try:
+            sujo_em = os.stat(os.path.join(pasta, ARQUIVO_SUJO)).st_mtime
+        except OSError:
+            sujo_em = 0
+
+        chave = (estado.st_ino, estado.st_mtime_ns)
+        if chave != self._chave:
+            try:
+                self._carregar(pasta, chave)
+            except (OSError, ValueError):
+                return None
+        with self._lock:
+            meta, arquivos = self._meta, self._arquivos
+        if None not in arquivos:
+            return None  # catalog.json sumiu (limpeza manual, disco): volta à consulta ao vivo
+
+        # Há alterações depois do snapshot e ele já passou da tolerância (publicador parado ou atrasado)
+        if sujo_em > meta['gerado_em'] and time.time() - meta['gerado_em'] > app.config['CATALOG_SNAPSHOT_MAX_STALENESS']:
+            return None
+
+        etag = meta['etag']
+        last_modified = datetime.fromisoformat(meta['last_modified']) if meta['last_modified'] else None
+        max_age = app.config.get('CATALOG_CACHE_MAX_AGE', 0)
+
+        codificacao = next(
+            (c for c, _ in VARIANTES if c in arquivos and request.accept_encodings.quality(c) > 0), None
+        )
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(arquivos[codificacao], mimetype='application/json')
+            if codificacao:
+                response.headers['Content-Encoding'] = codificacao
+        response.vary.add('Accept-Encoding')
+        aplicar_cache_headers(response, etag, last_modified, max_age)
+        if codificacao:
+            response.set_etag(etag, weak=True)  # Como na compressão dinâmica
+        return response
+
+
+leitor_snapshot = LeitorSnapshot()
+
+
+# --- Detecção de commits que alteram livros ---
+# 'estrutura': livros criados, editados ou removidos (o snapshot fica desatualizado);
+# 'estoque': só quantidade/updated_at (regerado sem pressa; o estoque chega pelo SSE)
+
+CAMPOS_ESTOQUE = {'quantidade', 'updated_at'}
+
+
+def _marcar(session, tipo):
+    if session.info.get('snapshot_catalogo') != 'estrutura':
+        session.info['snapshot_catalogo'] = tipo
+
+
+def _apenas_estoque(livro):
+    alterados = {attr.key for attr in sa.inspect(livro).attrs if attr.history.has_changes()}
+    return alterados <= CAMPOS_ESTOQUE
+
+
+@sa.event.listens_for(RoutingSession, 'after_flush')
+def _livros_no_flush(session, contexto):
+    if any(isinstance(obj, Livro) for obj in (*session.new, *session.deleted)):
+        _marcar(session, 'estrutura')
+    for obj in session.dirty:
+        if isinstance(obj, Livro):
+            _marcar(session, 'estoque' if _apenas_estoque(obj) else 'estrutura')
+
+
+@sa.event.listens_for(RoutingSession, 'do_orm_execute')
+def _livros_em_lote(estado):
+    # UPDATE/INSERT/DELETE em massa (reservar_exemplar, importação) não passam pelo flush
+    if (estado.is_update or estado.is_insert or estado.is_delete) and any(
+        mapper.class_ is Livro for mapper in estado.all_mappers
+    ):
+        _marcar(estado.session, 'estoque' if estado.execution_options.get('apenas_estoque') else 'estrutura')
+
+
+@sa.event.listens_for(RoutingSession, 'after_commit')
+def _publicar_snapshot(session):
+    tipo = session.info.pop('snapshot_catalogo', None)
+    if tipo is None or not has_app_context():
+        return
+    app = current_app._get_current_object()
+    if not diretorio(app):
+        return
+    if tipo == 'estrutura':
+        marcar_sujo(app)
+        publicador_snapshot.agendar(app)
+    else:
+        marcar_sujo(app, ARQUIVO_ESTOQUE)
+        publicador_snapshot.agendar(app, app.config['CATALOG_SNAPSHOT_STOCK_INTERVAL'])
+
+
+@sa.event.listens_for(RoutingSession, 'after_rollback')
+def _descartar_snapshot(session):
+    session.info.pop('snapshot_catalogo', None)
+
+
+@livros_cli.command('snapshot')
+def snapshot_comando():
+    """Gera agora o snapshot estático do catálogo (CATALOG_SNAPSHOT_DIR)."""
+    app = current_app._get_current_object()
+    if not diretorio(app):
+        raise click.ClickException('CATALOG_SNAPSHOT_DIR não configurado')
+    meta = gerar_snapshot(app, forcar=True)
+    click.echo(f"Snapshot com {meta['total']} livro(s) gravado em {diretorio(app)}")
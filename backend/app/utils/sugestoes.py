@@ -0,0 +1,204 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+
+from app import db
+from app.models import Livro
+
+_PALAVRA = re.compile(r'\w+', re.UNICODE)
+# Maior caractere Unicode: prefixo + _MAXIMO fecha a faixa de chaves com aquele prefixo
+_MAXIMO = '\U0010ffff'
+# Custo relativo de testar um livro na varredura por título vs. juntar uma entrada do índice
+_CUSTO_VARREDURA = 4
+
+
+def dobrar(texto):
+    """Minúsculas e sem acentos ('Machado de Assís' -> 'machado de assis')"""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def tokens(texto):
+    return _PALAVRA.findall(dobrar(texto))
+
+
+class IndiceSugestoes:
+    """Índice de prefixos (por processo) dos títulos e autores do catálogo.
+
+    Uma lista ordenada de (token, id) é consultada com bisect: as sugestões saem
+    da memória, sem consultar o banco. As rotas de escrita atualizam o índice do
+    próprio worker após o commit; os demais percebem a mudança pela versão dos
+    títulos (total de livros e última mudança de título/autor), verificada a
+    cada `intervalo` segundos. Com o índice já carregado, a reconstrução roda
+    numa thread e as consultas seguem com o índice atual.
+    """
+
+    def __init__(self):
+        self._entradas = []  # (token, id) em ordem
+        self._titulos = []  # (título dobrado, id) em ordem
+        self._livros = {}  # id -> (titulo, autor, titulo dobrado, tokens do título, tokens do livro)
+        self._versao = None
+        self._verificado_em = 0.0
+        self._lock = threading.Lock()
+        self._reconstruindo = threading.Lock()
+        self._alteracoes = 0  # atualizar/remover locais; detecta escritas durante uma reconstrução
+
+    def _dados_livro(self, titulo, autor):
+        do_titulo = tokens(titulo)
+        return (titulo, autor, dobrar(titulo), frozenset(do_titulo), frozenset(do_titulo + tokens(autor)))
+
+    # --- Atualização ---
+
+    def reconstruir(self, versao=None):
+        """Recarrega o índice inteiro (id, título e autor de todos os livros)"""
+        alteracoes = self._alteracoes
+        livros = {}
+        entradas = []
+        for id_, titulo, autor in db.session.execute(db.select(Livro.id, Livro.titulo, Livro.autor)):
+            livros[id_] = self._dados_livro(titulo, autor)
+            entradas.extend((token, id_) for token in livros[id_][4])
+        entradas.sort()
+        titulos = sorted((dados[2], id_) for id_, dados in livros.items())
+        with self._lock:
+            self._entradas = entradas
+            self._titulos = titulos
+            self._livros = livros
+            self._versao = versao
+            # Uma escrita local durante a carga pode ter ficado de fora: verifica de novo na próxima consulta
+            self._verificado_em = time.monotonic() if self._alteracoes == alteracoes else 0.0
+
+    def garantir_atualizado(self, app, versao_atual, intervalo):
+        """Reconstrói se a versão mudou; `versao_atual` só é chamada a cada `intervalo` segundos.
+
+        Só a primeira carga bloqueia a requisição; depois, a reconstrução roda em segundo plano.
+        """
+        if self._versao is not None and time.monotonic() - self._verificado_em < intervalo:
+            return
+        # Só uma thread reconstrói; as demais seguem com o índice atual (se houver)
+        if not self._reconstruindo.acquire(blocking=self._versao is None):
+            return
+        em_segundo_plano = False
+        try:
+            if self._versao is not None and time.monotonic() - self._verificado_em < intervalo:
+                return
+            versao = versao_atual()
+            if versao == self._versao:
+                self._verificado_em = time.monotonic()
+            elif self._versao is None:
+                self.reconstruir(versao)
+            else:
+                threading.Thread(
+                    target=self._reconstruir_em_segundo_plano, args=(app, versao),
+                    name='indice-sugestoes', daemon=True
+                ).start()
+                em_segundo_plano = True
+        finally:
+            if not em_segundo_plano:
+                self._reconstruindo.release()
+
+    def _reconstruir_em_segundo_plano(self, app, versao):
+        try:
+            with app.app_context():
+                self.reconstruir(versao)
+        except Exception:
+            app.logger.exception('Falha ao reconstruir o índice de sugestões')
+        finally:
+            self._reconstruindo.release()
+
+    def atualizar(self, livro):
+        """Inclui ou substitui um livro (chamado após o commit de create/update)"""
+        dados = self._dados_livro(livro.titulo, livro.autor)
+        with self._lock:
+            self._alteracoes += 1
+            if self._versao is None:
+                return  # Índice ainda não carregado: a primeira consulta carrega tudo
+            self._remover(livro.id)
+            self._livros[livro.id] = dados
+            for token in dados[4]:
+                bisect.insort(self._entradas, (token, livro.id))
+            bisect.insort(self._titulos, (dados[2], livro.id))
+
+    def remover(self, livro_id):
+        with self._lock:
+            self._alteracoes += 1
+            self._remover(livro_id)
+
+    def _remover(self, livro_id):
+        dados = self._livros.pop(livro_id, None)
+        if dados is None:
+            return
+        for token in dados[4]:
+            posicao = bisect.bisect_left(self._entradas, (token, livro_id))
+            if posicao < len(self._entradas) and self._entradas[posicao] == (token, livro_id):
+                del self._entradas[posicao]
+        posicao = bisect.bisect_left(self._titulos, (dados[2], livro_id))
+        if posicao < len(self._titulos) and self._titulos[posicao] == (dados[2], livro_id):
+            del self._titulos[posicao]
+
+    def invalidar(self):
+        """Força a verificação da versão na próxima consulta (ex.: após uma importação)"""
+        with self._lock:
+            self._verificado_em = 0.0
+
+    # --- Consulta ---
+
+    @staticmethod
+    def _faixa(lista, prefixo):
+        """Posições [inicio, fim) dos itens da lista ordenada cuja chave começa pelo prefixo"""
+        return bisect.bisect_left(lista, (prefixo,)), bisect.bisect_left(lista, (prefixo + _MAXIMO,))
+
+    def sugerir(self, termo, limite):
+        """Até `limite` livros cujo título/autor tem tokens começando por cada palavra do termo.
+
+        Ordem: títulos que começam pelo termo e, depois, os demais em ordem alfabética.
+        """
+        palavras = tokens(termo)
+        if not palavras:
+            return []
+        with self._lock:
+            livros = self._livros
+
+            # 1) Títulos que começam pelo termo: uma faixa contínua, já em ordem alfabética
+            inicio, fim = self._faixa(self._titulos, ' '.join(palavras))
+            melhores = [id_ for _, id_ in self._titulos[inicio:min(fim, inicio + limite)]]
+
+            if len(melhores) < limite:
+                # 2) Demais livros, a partir da palavra com menos entradas no índice
+                faixas = sorted(
+                    ((self._faixa(self._entradas, p), p) for p in palavras),
+                    key=lambda item: item[0][1] - item[0][0]
+                )
+                (inicio, fim), _ = faixas[0]
+                # A primeira palavra já é garantida pela faixa; as outras são testadas por livro
+                outras = [p for _, p in faixas[1:]]
+
+                def combina(id_, exigidas):
+                    livro_tokens = livros[id_][4]
+                    # Palavras já completas (todas menos a última digitada) costumam ser tokens exatos
+                    return all(p in livro_tokens or any(t.startswith(p) for t in livro_tokens) for p in exigidas)
+
+                ja_incluidos = set(melhores)
+                faltam = limite - len(melhores)
+                entradas = fim - inicio
+                # Percorrer os títulos em ordem custa ~faltam/densidade livros (com um teste mais caro)
+                varredura = _CUSTO_VARREDURA * faltam * len(self._titulos) / max(entradas, 1)
+                if 0 < entradas <= varredura:
+                    candidatos = {id_ for _, id_ in self._entradas[inicio:fim]} - ja_incluidos
+                    if outras:
+                        candidatos = [id_ for id_ in candidatos if combina(id_, outras)]
+                    melhores += heapq.nsmallest(faltam, candidatos, key=lambda id_: (livros[id_][2], id_))
+                elif entradas:
+                    # Prefixo comum: os primeiros títulos em ordem alfabética já combinam
+                    for _, id_ in self._titulos:
+                        if id_ not in ja_incluidos and combina(id_, palavras):
+                            melhores.append(id_)
+                            if len(melhores) == limite:
+                                break
+
+            return [{'id': id_, 'titulo': livros[id_][0], 'autor': livros[id_][1]} for id_ in melhores]
+
+
+indice_sugestoes = IndiceSugestoes()
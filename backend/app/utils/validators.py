@@ -1,4 +1,5 @@
 import re
+from datetime import datetime, timedelta
 
 def validar_email(email):
     """Validação básica de email"""
@@ -12,4 +13,20 @@ def validar_dados_obrigatorios(**kwargs):
         if not valor or (isinstance(valor, str) and not valor.strip()):
             campos_vazios.append(campo)
     
-    return campos_vazios
\ No newline at end of file
+    return campos_vazios
+
+def parse_periodo(de, ate):
+    """Converte 'de'/'ate' (ISO 8601) em datetimes; datas sem hora incluem o dia inteiro em 'ate'.
+
+    Lança ValueError se alguma data for inválida.
+    """
+    inicio = datetime.fromisoformat(de) if de else None
+    fim = None
+    if ate:
+        fim = datetime.fromisoformat(ate)
+        if len(ate) == 10:
+            try:
+                fim += timedelta(days=1)
+            except OverflowError as e:  # 9999-12-31
+                raise ValueError('Data fora do intervalo suportado') from e
+    return inicio, fim
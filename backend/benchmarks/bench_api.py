@@ -0,0 +1,219 @@
+"""Benchmark dos caminhos críticos da API.
+
+Por padrão roda em processo, com o test client do Flask, contra o banco de
+DATABASE_URL (popule antes com benchmarks/seed.py). Com --url, usa o gerador
+de carga HTTP de scripts/loadtest.py contra um servidor já em execução.
+
+Exemplos:
+    DATABASE_URL=sqlite:///bench.db python benchmarks/bench_api.py --saida resultado.json
+    DATABASE_URL=sqlite:///bench.db python benchmarks/bench_api.py --accept-encoding 'br, gzip'
+    python benchmarks/bench_api.py --url http://localhost:5000 --concorrencia 32 --duracao 15
+
+Em processo, o rate limit do login fica desligado (senão o cenário mede só
+respostas 429). Com --url, suba o servidor com LOGIN_RATE_LIMIT_IP=0 e
+LOGIN_RATE_LIMIT_USER=0.
+
+O JSON gerado pode ser comparado entre commits com benchmarks/compare.py.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+from loadtest import executar_carga, resumir_latencias  # noqa: E402
+from seed import BENCH_ADMIN, BENCH_SENHA, PALAVRAS  # noqa: E402
+
+# Livro com estoque "infinito" usado pelo cenário de criação de doações
+LIVRO_BENCH = 1
+
+DOACAO = {
+    'nome': 'Doador Benchmark',
+    'email': 'bench@exemplo.com',
+    'tipo': 'livro',
+    'item': 'Livro de benchmark',
+    'livro_id': LIVRO_BENCH,
+    'lgpdConsent': True,
+}
+
+
+def cenarios():
+    """(nome, método, caminho, corpo, autenticado)"""
+    return [
+        ('livros_lista', 'GET', '/api/livros', None, False),
+        ('livros_busca', 'GET', '/api/livros?search={palavra}', None, False),
+        ('livros_sugestao', 'GET', '/api/livros/suggest?q={palavra}', None, False),
+        ('doacoes_pagina', 'GET', '/api/doacoes?limit=50', None, True),
+        ('doacoes_busca', 'GET', '/api/doacoes?limit=50&search={palavra}', None, True),
+        ('doacoes_criar', 'POST', '/api/doacoes', DOACAO, False),
+        ('stats', 'GET', '/api/stats', None, True),
+        ('stats_sem_cache', 'GET', '/api/stats', None, True),
+        ('stats_timeseries', 'GET', '/api/stats/timeseries?granularity=week', None, True),
+        ('login', 'POST', '/api/auth/login', {'username': BENCH_ADMIN, 'password': BENCH_SENHA}, False),
+        ('login_sem_cache', 'POST', '/api/auth/login', {'username': BENCH_ADMIN, 'password': BENCH_SENHA}, False),
+    ]
+
+
+def pico_rss_mb():
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+
+def commit_atual():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def consultas_sql(response):
+    # O header Server-Timing traz 'db;dur=...;desc="N queries"'
+    timing = response.headers.get('Server-Timing', '')
+    if 'desc="' not in timing:
+        return None
+    return int(timing.split('desc="')[1].split()[0])
+
+
+def bench_em_processo(iteracoes, aquecimento, accept_encoding=None):
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///bench.db')
+    os.environ.setdefault('EMAIL_WORKER_ENABLED', 'False')
+    # Sem rate limit: o cenário de login mede a verificação da senha, não respostas 429
+    os.environ['LOGIN_RATE_LIMIT_IP'] = '0'
+    os.environ['LOGIN_RATE_LIMIT_USER'] = '0'
+
+    from app import create_app, db
+    from app.models import Livro
+    from app.utils.cache import limpar_estatisticas
+
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        livro = db.session.get(Livro, LIVRO_BENCH)
+        if livro is None:
+            sys.exit('Banco vazio: rode benchmarks/seed.py antes do benchmark')
+        livro.quantidade = 10 ** 9
+        db.session.commit()
+
+    login = client.post('/api/auth/login', json={'username': BENCH_ADMIN, 'password': BENCH_SENHA})
+    token = login.get_json()['token']
+    auth = {'Authorization': f'Bearer {token}'}
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+
+    resultados = {}
+    for nome, metodo, caminho, corpo, autenticado in cenarios():
+        latencias = []
+        consultas = None
+        status = {}
+        inicio = time.perf_counter()
+        for i in range(aquecimento + iteracoes):
+            url = caminho.format(palavra=PALAVRAS[i % len(PALAVRAS)])
+            if nome in ('stats_sem_cache', 'stats_timeseries'):
+                limpar_estatisticas()
+            if nome == 'login_sem_cache':
+                app.extensions['credenciais_cache'].clear()  # Cada login calcula o hash da senha
+            t0 = time.perf_counter()
+            response = client.open(url, method=metodo, json=corpo, headers={**headers, **auth} if autenticado else headers)
+            duracao = time.perf_counter() - t0
+            if i < aquecimento:
+                inicio = time.perf_counter()
+                continue
+            latencias.append(duracao)
+            status[str(response.status_code)] = status.get(str(response.status_code), 0) + 1
+            consultas = consultas_sql(response)
+            tamanho = len(response.data)
+        total = time.perf_counter() - inicio
+
+        resultados[nome] = {
+            'requisicoes': len(latencias),
+            'req_por_segundo': round(len(latencias) / total, 1),
+            'latencia_ms': resumir_latencias(latencias),
+            'consultas_sql': consultas,
+            'bytes_resposta': tamanho,
+            'status': status,
+            'pico_rss_mb': pico_rss_mb(),
+        }
+        print(f"{nome:<18} p50 {resultados[nome]['latencia_ms']['p50']:>8} ms  "
+              f"p95 {resultados[nome]['latencia_ms']['p95']:>8} ms  "
+              f"{resultados[nome]['req_por_segundo']:>8} req/s", file=sys.stderr)
+
+    with app.app_context():
+        banco = db.engine.dialect.name
+    return banco, resultados
+
+
+def bench_http(base_url, concorrencia, duracao):
+    headers = {'Content-Type': 'application/json'}
+    req = urllib.request.Request(
+        f'{base_url}/api/auth/login',
+        data=json.dumps({'username': BENCH_ADMIN, 'password': BENCH_SENHA}).encode(),
+        headers=headers, method='POST'
+    )
+    with urllib.request.urlopen(req) as resp:
+        token = json.loads(resp.read())['token']
+
+    resultados = {}
+    for nome, metodo, caminho, corpo, autenticado in cenarios():
+        if nome in ('stats_sem_cache', 'login_sem_cache'):
+            continue
+        h = dict(headers)
+        if autenticado:
+            h['Authorization'] = f'Bearer {token}'
+        url = base_url + caminho.format(palavra=PALAVRAS[0])
+        dados = json.dumps(corpo).encode() if corpo else None
+        resultados[nome] = executar_carga(url, metodo, dados, h, concorrencia, duracao)
+        print(f"{nome:<18} p95 {resultados[nome]['latencia_ms']['p95']:>8} ms  "
+              f"{resultados[nome]['req_por_segundo']:>8} req/s", file=sys.stderr)
+    return 'http', resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iteracoes', type=int, default=200, help='Requisições por cenário (em processo)')
+    parser.add_argument('--aquecimento', type=int, default=10)
+    parser.add_argument('--accept-encoding', help="Header Accept-Encoding das requisições (ex.: 'br, gzip')")
+    parser.add_argument('--url', help='URL base de um servidor em execução (modo HTTP)')
+    parser.add_argument('--concorrencia', type=int, default=16, help='Somente no modo HTTP')
+    parser.add_argument('--duracao', type=float, default=10.0, help='Segundos por cenário no modo HTTP')
+    parser.add_argument('--saida', help='Arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+
+    if args.url:
+        banco, resultados = bench_http(args.url.rstrip('/'), args.concorrencia, args.duracao)
+    else:
+        banco, resultados = bench_em_processo(args.iteracoes, args.aquecimento, args.accept_encoding)
+
+    relatorio = {
+        'commit': commit_atual(),
+        'data': datetime.utcnow().isoformat(),
+        'modo': 'http' if args.url else 'processo',
+        'accept_encoding': args.accept_encoding,
+        'banco': banco,
+        'python': platform.python_version(),
+        'pico_rss_mb': pico_rss_mb(),
+        'resultados': resultados,
+    }
+
+    saida = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(saida + '\n')
+    else:
+        print(saida)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Compara os caminhos de serialização das listagens de livros e doações.
+
+Mede, sobre o banco de DATABASE_URL (popule antes com benchmarks/seed.py):
+  - orm_json:      objetos ORM + to_dict() + json da biblioteca padrão (caminho antigo)
+  - colunas_json:  with_entities + json da biblioteca padrão
+  - colunas_orjson: with_entities + orjson (caminho atual, quando instalado)
+e o tamanho do corpo sem compressão, com gzip e com brotli.
+
+Exemplo:
+    DATABASE_URL=sqlite:///bench.db python benchmarks/bench_serializacao.py --limite 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import Doacao, Livro  # noqa: E402
+from app.utils.compressao import brotli, comprimir  # noqa: E402
+from app.utils.json_provider import ProvedorJSON, orjson  # noqa: E402
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        corpo = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(tempos), 2), corpo
+
+
+def medir(app, model, chave, ordem, limite, repeticoes):
+    padrao = ProvedorJSON(app)
+    padrao.usar_orjson = False
+    rapido = ProvedorJSON(app)
+
+    def orm_json():
+        db.session.expunge_all()
+        itens = model.query.order_by(*ordem).limit(limite).all()
+        return padrao.dumps({'success': True, chave: [item.to_dict() for item in itens]}).encode()
+
+    def colunas(provider):
+        def serializar():
+            linhas = model.query.with_entities(*model.colunas_dict()).order_by(*ordem).limit(limite).all()
+            return provider.dumps({'success': True, chave: [linha._asdict() for linha in linhas]}).encode()
+        return serializar
+
+    caminhos = {'orm_json': orm_json, 'colunas_json': colunas(padrao)}
+    if orjson is not None:
+        caminhos['colunas_orjson'] = colunas(rapido)
+
+    resultado = {}
+    for nome, funcao in caminhos.items():
+        resultado[nome], corpo = cronometrar(funcao, repeticoes)
+
+    tamanhos = {'identity': len(corpo), 'gzip': len(comprimir(corpo, 'gzip', app.config))}
+    if brotli is not None:
+        tamanhos['br'] = len(comprimir(corpo, 'br', app.config))
+    return {'linhas': limite, 'mediana_ms': resultado, 'bytes': tamanhos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--limite', type=int, default=5000, help='Linhas por listagem')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///bench.db')
+    os.environ.setdefault('EMAIL_WORKER_ENABLED', 'False')
+    app = create_app()
+
+    with app.app_context():
+        relatorio = {
+            'livros': medir(app, Livro, 'livros', (Livro.titulo, Livro.id), args.limite, args.repeticoes),
+            'doacoes': medir(app, Doacao, 'doacoes', (Doacao.created_at.desc(), Doacao.id.desc()),
+                             args.limite, args.repeticoes),
+        }
+
+    print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
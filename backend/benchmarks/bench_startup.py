@@ -0,0 +1,58 @@
+"""Mede o tempo de inicialização a frio do app (import do wsgi em um processo novo).
+
+Cada amostra roda em um interpretador novo, como um worker ou contêiner
+subindo. No final mostra o perfil por etapa de uma execução (STARTUP_PROFILE=1).
+
+Exemplo:
+    DATABASE_URL=sqlite:///bench.db python benchmarks/bench_startup.py --amostras 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDIR = (
+    'import time; t = time.perf_counter(); import wsgi; '
+    'print((time.perf_counter() - t) * 1000)'
+)
+
+
+def amostra(env):
+    saida = subprocess.run(
+        [sys.executable, '-c', MEDIR], cwd=BACKEND_DIR, env=env,
+        check=True, capture_output=True, text=True
+    )
+    return float(saida.stdout.strip().splitlines()[-1]), saida.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--amostras', type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite:///bench.db')
+    env.setdefault('EMAIL_WORKER_ENABLED', 'False')
+    env.pop('FLASK_RUN_FROM_CLI', None)
+
+    tempos = [amostra(env)[0] for _ in range(args.amostras)]
+    _, perfil = amostra({**env, 'STARTUP_PROFILE': '1'})
+
+    print(perfil, file=sys.stderr)
+    print(json.dumps({
+        'amostras': args.amostras,
+        'import_wsgi_ms': {
+            'p50': round(statistics.median(tempos), 1),
+            'min': round(min(tempos), 1),
+            'max': round(max(tempos), 1),
+        },
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Compara dois resultados de benchmarks/bench_api.py e aponta regressões.
+
+Exemplo:
+    python benchmarks/compare.py base.json novo.json --tolerancia 0.15
+
+Sai com código 1 se o p95 de algum cenário piorar além da tolerância.
+"""
+import argparse
+import json
+import sys
+
+
+def carregar(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('novo')
+    parser.add_argument('--tolerancia', type=float, default=0.15,
+                        help='Aumento relativo de p95 aceito (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    base, novo = carregar(args.base), carregar(args.novo)
+    print(f"base: {base.get('commit')} ({base.get('banco')})  novo: {novo.get('commit')} ({novo.get('banco')})")
+    print(f"{'cenário':<18} {'p95 base':>10} {'p95 novo':>10} {'variação':>9} {'req/s base':>11} {'req/s novo':>11}")
+
+    regressoes = []
+    for nome, atual in novo['resultados'].items():
+        anterior = base['resultados'].get(nome)
+        if anterior is None:
+            continue
+        p95_base = anterior['latencia_ms']['p95']
+        p95_novo = atual['latencia_ms']['p95']
+        variacao = (p95_novo - p95_base) / p95_base if p95_base else 0.0
+        marca = ' <-- regressão' if variacao > args.tolerancia else ''
+        if marca:
+            regressoes.append(nome)
+        print(f"{nome:<18} {p95_base:>10} {p95_novo:>10} {variacao:>+8.0%} "
+              f"{anterior['req_por_segundo']:>11} {atual['req_por_segundo']:>11}{marca}")
+
+    if regressoes:
+        print(f"\nRegressões acima de {args.tolerancia:.0%}: {', '.join(regressoes)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Configuração do gunicorn (carregada com: gunicorn -c gunicorn.conf.py wsgi:app)"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Recicla workers periodicamente para conter vazamentos de memória
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'False').lower() in ('true', '1', 't')
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    # Com preload_app, congela os objetos já criados no mestre: o coletor de lixo
+    # dos workers não os percorre, evitando copiar essas páginas (copy-on-write)
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Com preload_app o engine é criado no processo mestre; as conexões herdadas
+    # não podem ser compartilhadas entre processos, então cada worker descarta o pool
+    if preload_app:
+        from wsgi import app
+        from app import db
+
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Cada worker inicia a thread da fila de emails ao subir (não só no primeiro
+    # email enfileirado); no mestre a thread não sobreviveria ao fork
+    from wsgi import app
+    from app.utils.email_queue import email_worker
+
+    email_worker.iniciar(app)
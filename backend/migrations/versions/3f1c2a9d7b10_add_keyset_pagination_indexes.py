@@ -0,0 +1,32 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: 3f1c2a9d7b10
+Revises: 828a74884193
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = '828a74884193'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('livros', schema=None) as batch_op:
+        batch_op.create_index('ix_livros_titulo_id', ['titulo', 'id'], unique=False)
+
+    with op.batch_alter_table('doacoes', schema=None) as batch_op:
+        batch_op.create_index('ix_doacoes_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('doacoes', schema=None) as batch_op:
+        batch_op.drop_index('ix_doacoes_created_at_id')
+
+    with op.batch_alter_table('livros', schema=None) as batch_op:
+        batch_op.drop_index('ix_livros_titulo_id')
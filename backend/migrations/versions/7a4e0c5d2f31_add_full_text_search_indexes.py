@@ -0,0 +1,159 @@
+"""Add full-text search indexes for livros and doacoes
+
+Revision ID: 7a4e0c5d2f31
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4e0c5d2f31'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+# DDL copiado de app/utils/search.py nesta revisão: a migração não importa o app,
+# para continuar gerando o mesmo schema mesmo que a busca mude depois
+
+DDL_CONFIG_POSTGRESQL = [
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+]
+
+DDL_POSTGRESQL_LIVROS = [
+    'ALTER TABLE livros ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """
+    CREATE OR REPLACE FUNCTION livros_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.titulo, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.autor, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS livros_search_vector_trg ON livros',
+    """
+    CREATE TRIGGER livros_search_vector_trg
+    BEFORE INSERT OR UPDATE OF titulo, autor ON livros
+    FOR EACH ROW EXECUTE FUNCTION livros_search_vector_update()
+    """,
+    'UPDATE livros SET titulo = titulo',
+    'CREATE INDEX IF NOT EXISTS ix_livros_search_vector ON livros USING GIN (search_vector)',
+]
+
+DDL_SQLITE_LIVROS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS livros_fts USING fts5(
+        titulo, autor, content='livros', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_fts_ai AFTER INSERT ON livros BEGIN
+        INSERT INTO livros_fts(rowid, titulo, autor) VALUES (new.id, new.titulo, new.autor);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_fts_ad AFTER DELETE ON livros BEGIN
+        INSERT INTO livros_fts(livros_fts, rowid, titulo, autor) VALUES ('delete', old.id, old.titulo, old.autor);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_fts_au AFTER UPDATE ON livros BEGIN
+        INSERT INTO livros_fts(livros_fts, rowid, titulo, autor) VALUES ('delete', old.id, old.titulo, old.autor);
+        INSERT INTO livros_fts(rowid, titulo, autor) VALUES (new.id, new.titulo, new.autor);
+    END
+    """,
+    "INSERT INTO livros_fts(livros_fts) VALUES ('rebuild')",
+]
+
+DDL_POSTGRESQL_DOACOES = [
+    'ALTER TABLE doacoes ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """
+    CREATE OR REPLACE FUNCTION doacoes_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.nome, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.item, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.email, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS doacoes_search_vector_trg ON doacoes',
+    """
+    CREATE TRIGGER doacoes_search_vector_trg
+    BEFORE INSERT OR UPDATE OF nome, item, email ON doacoes
+    FOR EACH ROW EXECUTE FUNCTION doacoes_search_vector_update()
+    """,
+    'UPDATE doacoes SET nome = nome',
+    'CREATE INDEX IF NOT EXISTS ix_doacoes_search_vector ON doacoes USING GIN (search_vector)',
+]
+
+DDL_SQLITE_DOACOES = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS doacoes_fts USING fts5(
+        nome, item, email, content='doacoes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_fts_ai AFTER INSERT ON doacoes BEGIN
+        INSERT INTO doacoes_fts(rowid, nome, item, email) VALUES (new.id, new.nome, new.item, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_fts_ad AFTER DELETE ON doacoes BEGIN
+        INSERT INTO doacoes_fts(doacoes_fts, rowid, nome, item, email) VALUES ('delete', old.id, old.nome, old.item, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_fts_au AFTER UPDATE ON doacoes BEGIN
+        INSERT INTO doacoes_fts(doacoes_fts, rowid, nome, item, email) VALUES ('delete', old.id, old.nome, old.item, old.email);
+        INSERT INTO doacoes_fts(rowid, nome, item, email) VALUES (new.id, new.nome, new.item, new.email);
+    END
+    """,
+    "INSERT INTO doacoes_fts(doacoes_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        comandos = DDL_CONFIG_POSTGRESQL + DDL_POSTGRESQL_LIVROS + DDL_POSTGRESQL_DOACOES
+    elif dialeto == 'sqlite':
+        comandos = DDL_SQLITE_LIVROS + DDL_SQLITE_DOACOES
+    else:
+        comandos = []
+    for stmt in comandos:
+        op.execute(stmt)
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    for tabela in ('livros', 'doacoes'):
+        if dialeto == 'postgresql':
+            op.execute(f"DROP TRIGGER IF EXISTS {tabela}_search_vector_trg ON {tabela}")
+            op.execute(f"DROP FUNCTION IF EXISTS {tabela}_search_vector_update()")
+            op.execute(f"DROP INDEX IF EXISTS ix_{tabela}_search_vector")
+            op.execute(f"ALTER TABLE {tabela} DROP COLUMN IF EXISTS search_vector")
+        elif dialeto == 'sqlite':
+            for sufixo in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {tabela}_fts_{sufixo}")
+            op.execute(f"DROP TABLE IF EXISTS {tabela}_fts")
+    if dialeto == 'postgresql':
+        op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent")
@@ -0,0 +1,26 @@
+"""Add livro_id indexes on doacoes and doacoes_arquivadas
+
+Revision ID: a5c9e2d7b410
+Revises: f3d8b1e6a072
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c9e2d7b410'
+down_revision = 'f3d8b1e6a072'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_doacoes_livro_id', 'doacoes', ['livro_id'], unique=False)
+    op.create_index('ix_doacoes_arquivadas_livro_id', 'doacoes_arquivadas', ['livro_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_doacoes_arquivadas_livro_id', table_name='doacoes_arquivadas')
+    op.drop_index('ix_doacoes_livro_id', table_name='doacoes')
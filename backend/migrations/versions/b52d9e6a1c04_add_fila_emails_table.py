@@ -0,0 +1,41 @@
+"""Add fila_emails outbox table
+
+Revision ID: b52d9e6a1c04
+Revises: 7a4e0c5d2f31
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52d9e6a1c04'
+down_revision = '7a4e0c5d2f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fila_emails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('destinatario', sa.String(length=255), nullable=False),
+    sa.Column('assunto', sa.String(length=255), nullable=False),
+    sa.Column('html', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('ultimo_erro', sa.Text(), nullable=True),
+    sa.Column('proxima_tentativa_em', sa.DateTime(), nullable=True),
+    sa.Column('enviado_em', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('fila_emails', schema=None) as batch_op:
+        batch_op.create_index('ix_fila_emails_status_proxima', ['status', 'proxima_tentativa_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('fila_emails', schema=None) as batch_op:
+        batch_op.drop_index('ix_fila_emails_status_proxima')
+
+    op.drop_table('fila_emails')
@@ -0,0 +1,38 @@
+"""Add respostas_idempotentes table for Idempotency-Key on donation creation
+
+Revision ID: b9d4e7f2a318
+Revises: a5c9e2d7b410
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4e7f2a318'
+down_revision = 'a5c9e2d7b410'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('respostas_idempotentes',
+    sa.Column('chave', sa.String(length=255), nullable=False),
+    sa.Column('rota', sa.String(length=100), nullable=False),
+    sa.Column('hash_requisicao', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.Integer(), nullable=True),
+    sa.Column('corpo', sa.Text(), nullable=True),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('chave', 'rota')
+    )
+    with op.batch_alter_table('respostas_idempotentes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_respostas_idempotentes_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('respostas_idempotentes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_respostas_idempotentes_created_at'))
+
+    op.drop_table('respostas_idempotentes')
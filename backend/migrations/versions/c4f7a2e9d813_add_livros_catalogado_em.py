@@ -0,0 +1,32 @@
+"""Add livros.catalogado_em (last title/author change) for the suggest index version
+
+Revision ID: c4f7a2e9d813
+Revises: b9d4e7f2a318
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f7a2e9d813'
+down_revision = 'b9d4e7f2a318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('livros', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('catalogado_em', sa.DateTime(), nullable=True))
+
+    op.execute('UPDATE livros SET catalogado_em = COALESCE(updated_at, created_at)')
+
+    with op.batch_alter_table('livros', schema=None) as batch_op:
+        batch_op.create_index('ix_livros_catalogado_em', ['catalogado_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('livros', schema=None) as batch_op:
+        batch_op.drop_index('ix_livros_catalogado_em')
+        batch_op.drop_column('catalogado_em')
@@ -0,0 +1,25 @@
+"""Add unique index on livros (titulo, autor)
+
+Revision ID: c8e3f1a7d925
+Revises: b52d9e6a1c04
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e3f1a7d925'
+down_revision = 'b52d9e6a1c04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Índice único (e não constraint) para não recriar a tabela no SQLite
+    op.create_index('uq_livros_titulo_autor', 'livros', ['titulo', 'autor'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_livros_titulo_autor', table_name='livros')
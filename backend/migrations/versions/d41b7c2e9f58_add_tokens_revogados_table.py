@@ -0,0 +1,37 @@
+"""Add tokens_revogados table for JWT revocation
+
+Revision ID: d41b7c2e9f58
+Revises: c8e3f1a7d925
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41b7c2e9f58'
+down_revision = 'c8e3f1a7d925'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tokens_revogados',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=36), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tokens_revogados', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tokens_revogados_jti'), ['jti'], unique=True)
+        batch_op.create_index(batch_op.f('ix_tokens_revogados_expira_em'), ['expira_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tokens_revogados', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tokens_revogados_expira_em'))
+        batch_op.drop_index(batch_op.f('ix_tokens_revogados_jti'))
+
+    op.drop_table('tokens_revogados')
@@ -0,0 +1,52 @@
+"""Add daily donation rollup tables for time-series stats
+
+Revision ID: e7a2c94f3b16
+Revises: d41b7c2e9f58
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c94f3b16'
+down_revision = 'd41b7c2e9f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resumo_doacoes_dia',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('tipo', sa.String(length=10), nullable=False),
+    sa.Column('livro_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'tipo', 'livro_id')
+    )
+    op.create_table('resumo_doadores_dia',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('nome', sa.String(length=255), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'email')
+    )
+
+    # Preenche os resumos com as doações já existentes
+    op.execute(
+        "INSERT INTO resumo_doacoes_dia (dia, tipo, livro_id, total) "
+        "SELECT date(created_at), tipo, COALESCE(livro_id, 0), COUNT(*) FROM doacoes "
+        "WHERE created_at IS NOT NULL "
+        "GROUP BY date(created_at), tipo, COALESCE(livro_id, 0)"
+    )
+    op.execute(
+        "INSERT INTO resumo_doadores_dia (dia, email, nome, total) "
+        "SELECT date(created_at), email, MAX(nome), COUNT(*) FROM doacoes "
+        "WHERE created_at IS NOT NULL "
+        "GROUP BY date(created_at), email"
+    )
+
+
+def downgrade():
+    op.drop_table('resumo_doadores_dia')
+    op.drop_table('resumo_doacoes_dia')
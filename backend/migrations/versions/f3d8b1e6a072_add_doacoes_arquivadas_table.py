@@ -0,0 +1,142 @@
+"""Add doacoes_arquivadas table for archival and soft-deleted donations
+
+Revision ID: f3d8b1e6a072
+Revises: e7a2c94f3b16
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3d8b1e6a072'
+down_revision = 'e7a2c94f3b16'
+branch_labels = None
+depends_on = None
+
+# DDL da busca copiado de app/utils/search.py nesta revisão: a migração não importa o app
+
+DDL_SQLITE_DOACOES = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS doacoes_fts USING fts5(
+        nome, item, email, content='doacoes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_fts_ai AFTER INSERT ON doacoes BEGIN
+        INSERT INTO doacoes_fts(rowid, nome, item, email) VALUES (new.id, new.nome, new.item, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_fts_ad AFTER DELETE ON doacoes BEGIN
+        INSERT INTO doacoes_fts(doacoes_fts, rowid, nome, item, email) VALUES ('delete', old.id, old.nome, old.item, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_fts_au AFTER UPDATE ON doacoes BEGIN
+        INSERT INTO doacoes_fts(doacoes_fts, rowid, nome, item, email) VALUES ('delete', old.id, old.nome, old.item, old.email);
+        INSERT INTO doacoes_fts(rowid, nome, item, email) VALUES (new.id, new.nome, new.item, new.email);
+    END
+    """,
+    "INSERT INTO doacoes_fts(doacoes_fts) VALUES ('rebuild')",
+]
+
+DDL_POSTGRESQL_DOACOES_ARQUIVADAS = [
+    'ALTER TABLE doacoes_arquivadas ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """
+    CREATE OR REPLACE FUNCTION doacoes_arquivadas_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.nome, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.item, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent', coalesce(NEW.email, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS doacoes_arquivadas_search_vector_trg ON doacoes_arquivadas',
+    """
+    CREATE TRIGGER doacoes_arquivadas_search_vector_trg
+    BEFORE INSERT OR UPDATE OF nome, item, email ON doacoes_arquivadas
+    FOR EACH ROW EXECUTE FUNCTION doacoes_arquivadas_search_vector_update()
+    """,
+    'UPDATE doacoes_arquivadas SET nome = nome',
+    'CREATE INDEX IF NOT EXISTS ix_doacoes_arquivadas_search_vector ON doacoes_arquivadas USING GIN (search_vector)',
+]
+
+DDL_SQLITE_DOACOES_ARQUIVADAS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS doacoes_arquivadas_fts USING fts5(
+        nome, item, email, content='doacoes_arquivadas', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_arquivadas_fts_ai AFTER INSERT ON doacoes_arquivadas BEGIN
+        INSERT INTO doacoes_arquivadas_fts(rowid, nome, item, email) VALUES (new.id, new.nome, new.item, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_arquivadas_fts_ad AFTER DELETE ON doacoes_arquivadas BEGIN
+        INSERT INTO doacoes_arquivadas_fts(doacoes_arquivadas_fts, rowid, nome, item, email) VALUES ('delete', old.id, old.nome, old.item, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS doacoes_arquivadas_fts_au AFTER UPDATE ON doacoes_arquivadas BEGIN
+        INSERT INTO doacoes_arquivadas_fts(doacoes_arquivadas_fts, rowid, nome, item, email) VALUES ('delete', old.id, old.nome, old.item, old.email);
+        INSERT INTO doacoes_arquivadas_fts(rowid, nome, item, email) VALUES (new.id, new.nome, new.item, new.email);
+    END
+    """,
+    "INSERT INTO doacoes_arquivadas_fts(doacoes_arquivadas_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    op.create_table('doacoes_arquivadas',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('nome', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('tipo', sa.String(length=10), nullable=False),
+    sa.Column('item', sa.String(length=500), nullable=False),
+    sa.Column('livro_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('arquivada_em', sa.DateTime(), nullable=False),
+    sa.Column('excluida_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('doacoes_arquivadas', schema=None) as batch_op:
+        batch_op.create_index('ix_doacoes_arquivadas_created_at_id', ['created_at', 'id'], unique=False)
+
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'sqlite':
+        # AUTOINCREMENT: o SQLite não reutiliza ids de doações movidas para o arquivo.
+        # Recriar a tabela remove os triggers da busca, recriados logo abaixo.
+        with op.batch_alter_table('doacoes', recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        comandos = DDL_SQLITE_DOACOES + DDL_SQLITE_DOACOES_ARQUIVADAS
+    elif dialeto == 'postgresql':
+        comandos = DDL_POSTGRESQL_DOACOES_ARQUIVADAS
+    else:
+        comandos = []
+    for stmt in comandos:
+        op.execute(stmt)
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    tabela = 'doacoes_arquivadas'
+    if dialeto == 'postgresql':
+        op.execute(f"DROP TRIGGER IF EXISTS {tabela}_search_vector_trg ON {tabela}")
+        op.execute(f"DROP FUNCTION IF EXISTS {tabela}_search_vector_update()")
+    elif dialeto == 'sqlite':
+        for sufixo in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {tabela}_fts_{sufixo}")
+        op.execute(f"DROP TABLE IF EXISTS {tabela}_fts")
+
+    with op.batch_alter_table('doacoes_arquivadas', schema=None) as batch_op:
+        batch_op.drop_index('ix_doacoes_arquivadas_created_at_id')
+
+    op.drop_table('doacoes_arquivadas')
@@ -1,41 +1,17 @@
-from app import create_app, db
-from app.models import Admin, Livro
+"""Servidor de desenvolvimento.
 
-def init_db():
-    """Inicializar banco de dados com dados iniciais"""
-    db.create_all()
-    
-    # Criar admin padrão se não existir
-    admin = Admin.query.filter_by(username='admin').first()
-    if not admin:
-        admin = Admin(username='admin')
-        admin.set_password('123456')
-        db.session.add(admin)
-    
-    # Adicionar livros de exemplo se não existirem
-    if Livro.query.count() == 0:
-        livros_exemplo = [
-            {'titulo': 'O Alquimista', 'autor': 'Paulo Coelho', 'quantidade': 5},
-            {'titulo': '1984', 'autor': 'George Orwell', 'quantidade': 3},
-            {'titulo': 'Dom Casmurro', 'autor': 'Machado de Assis', 'quantidade': 2},
-            {'titulo': 'O Pequeno Príncipe', 'autor': 'Antoine de Saint-Exupéry', 'quantidade': 4},
-            {'titulo': 'Clean Code', 'autor': 'Robert C. Martin', 'quantidade': 1},
-            {'titulo': 'Harry Potter e a Pedra Filosofal', 'autor': 'J.K. Rowling', 'quantidade': 0},
-            {'titulo': 'O Hobbit', 'autor': 'J.R.R. Tolkien', 'quantidade': 3},
-            {'titulo': 'Sapiens', 'autor': 'Yuval Noah Harari', 'quantidade': 2},
-        ]
-        
-        for livro_data in livros_exemplo:
-            livro = Livro(**livro_data)
-            db.session.add(livro)
-    
-    db.session.commit()
-    print("Banco de dados inicializado!")
+O banco não é mais inicializado a cada execução; para criar as tabelas,
+o admin padrão e os livros de exemplo, rode uma vez:
+    flask --app wsgi seed
+"""
+import os
+
+from app import create_app
+from app.utils.email_queue import email_worker
 
 if __name__ == '__main__':
     app = create_app()
-    
-    with app.app_context():
-        init_db()
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Com o reloader, só o processo filho (que atende as requisições) drena a fila
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        email_worker.iniciar(app)
+    app.run(debug=True, host='0.0.0.0', port=5000)
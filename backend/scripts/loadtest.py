@@ -0,0 +1,112 @@
+"""Teste de carga simples contra um servidor em execução (sem dependências externas).
+
+Exemplo:
+    gunicorn -c gunicorn.conf.py wsgi:app &
+    python scripts/loadtest.py --url http://localhost:5000/api/livros --concorrencia 32 --duracao 20
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def executar_carga(url, metodo='GET', corpo=None, headers=None, concorrencia=16, duracao=10.0):
+    """Dispara requisições em paralelo durante `duracao` segundos e resume as latências"""
+    headers = headers or {}
+    latencias = []
+    status = {}
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def executar():
+        locais, status_locais = [], {}
+        while time.perf_counter() < fim:
+            req = urllib.request.Request(url, data=corpo, headers=headers, method=metodo)
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    resp.read()
+                    codigo = resp.status
+            except urllib.error.HTTPError as e:
+                codigo = e.code
+            except (urllib.error.URLError, OSError):
+                codigo = 'erro'
+            locais.append(time.perf_counter() - inicio)
+            status_locais[codigo] = status_locais.get(codigo, 0) + 1
+        with lock:
+            latencias.extend(locais)
+            for codigo, n in status_locais.items():
+                status[codigo] = status.get(codigo, 0) + n
+
+    threads = [threading.Thread(target=executar) for _ in range(concorrencia)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+
+    return {
+        'url': url,
+        'concorrencia': concorrencia,
+        'requisicoes': len(latencias),
+        'duracao_s': round(total, 2),
+        'req_por_segundo': round(len(latencias) / total, 1),
+        'latencia_ms': resumir_latencias(latencias),
+        'status': {str(k): v for k, v in status.items()},
+    }
+
+
+def resumir_latencias(latencias):
+    """Média e percentis (em ms) de uma lista de latências em segundos"""
+    return {
+        'media': round(statistics.mean(latencias) * 1000, 2) if latencias else 0.0,
+        'p50': round(percentil(latencias, 50) * 1000, 2),
+        'p95': round(percentil(latencias, 95) * 1000, 2),
+        'p99': round(percentil(latencias, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000/api/livros')
+    parser.add_argument('--metodo', default='GET')
+    parser.add_argument('--corpo', help='Corpo JSON enviado em cada requisição')
+    parser.add_argument('--token', help='JWT para rotas protegidas')
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--duracao', type=float, default=10.0, help='Segundos de teste')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    headers = {'Content-Type': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Bearer {args.token}'
+    corpo = args.corpo.encode('utf-8') if args.corpo else None
+
+    resultado = executar_carga(args.url, args.metodo, corpo, headers, args.concorrencia, args.duracao)
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        print(f"{resultado['requisicoes']} requisições em {resultado['duracao_s']}s "
+              f"({resultado['req_por_segundo']} req/s)")
+        lat = resultado['latencia_ms']
+        print(f"Latência (ms): média {lat['media']} | p50 {lat['p50']} | p95 {lat['p95']} | p99 {lat['p99']}")
+        print(f"Status: {resultado['status']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Teste de estresse da baixa de estoque em doações concorrentes.
+
+Cria um livro com estoque limitado e dispara várias doações em paralelo
+contra POST /api/doacoes, verificando que o estoque nunca fica negativo
+e que o número de doações aceitas é exatamente o estoque inicial. O
+controle de admissão fica desligado nessa rodada, para todas as
+requisições chegarem à baixa de estoque.
+
+Com --admissao, roda em seguida uma segunda rodada com o controle de
+admissão ligado, verificando que parte das requisições é descartada (503
+com Retry-After) sem deixar o estoque inconsistente.
+
+Uso:
+    DATABASE_URL=postgresql://... python scripts/stress_doacoes.py --requisicoes 500 --estoque 50
+
+Atenção: o script cria e remove tabelas no banco informado em DATABASE_URL.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import Doacao, Livro  # noqa: E402
+
+
+def criar_app(admissao):
+    os.environ['ADMISSION_ENABLED'] = str(admissao)
+    app = create_app()
+    app.config['MAIL_SUPPRESS_SEND'] = True
+    return app
+
+
+def disparar(app, args):
+    """Recria as tabelas e dispara as doações em paralelo; retorna (respostas, estoque final, doações gravadas)"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        livro = Livro(titulo='Livro de Estresse', autor='Teste', quantidade=args.estoque)
+        db.session.add(livro)
+        db.session.commit()
+        livro_id = livro.id
+
+    payload = {
+        'nome': 'Doador',
+        'email': 'doador@exemplo.com',
+        'tipo': 'livro',
+        'item': 'Livro de Estresse - Teste',
+        'livro_id': livro_id,
+        'lgpdConsent': True,
+    }
+
+    def doar(_):
+        client = app.test_client()
+        response = client.post('/api/doacoes', json=payload)
+        return response.status_code, response.headers.get('Retry-After')
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        respostas = list(executor.map(doar, range(args.requisicoes)))
+    duracao = time.perf_counter() - inicio
+    print(f'Requisições: {len(respostas)} em {duracao:.2f}s ({len(respostas) / duracao:.1f} req/s)')
+
+    with app.app_context():
+        quantidade_final = db.session.get(Livro, livro_id).quantidade
+        total_doacoes = Doacao.query.filter_by(livro_id=livro_id).count()
+    return respostas, quantidade_final, total_doacoes
+
+
+def verificar_estoque(app, args):
+    respostas, quantidade_final, total_doacoes = disparar(app, args)
+    status = [codigo for codigo, _ in respostas]
+    aceitas = status.count(201)
+    recusadas = status.count(400)
+    erros = len(status) - aceitas - recusadas
+
+    print(f'Aceitas: {aceitas} | Sem estoque: {recusadas} | Erros: {erros}')
+    print(f'Estoque final: {quantidade_final} | Doações gravadas: {total_doacoes}')
+
+    esperadas = min(args.estoque, args.requisicoes)
+    ok = (
+        aceitas == esperadas
+        and recusadas == args.requisicoes - esperadas
+        and quantidade_final == args.estoque - aceitas
+        and total_doacoes == aceitas
+        and erros == 0
+    )
+    print('OK' if ok else 'FALHA: estoque inconsistente')
+    return ok
+
+
+def verificar_admissao(app, args):
+    respostas, quantidade_final, total_doacoes = disparar(app, args)
+    status = [codigo for codigo, _ in respostas]
+    aceitas = status.count(201)
+    recusadas = status.count(400)
+    descartadas = status.count(503)
+    sem_retry_after = sum(1 for codigo, retry_after in respostas if codigo == 503 and not retry_after)
+    erros = len(status) - aceitas - recusadas - descartadas
+
+    print(f'Aceitas: {aceitas} | Sem estoque: {recusadas} | Descartadas (503): {descartadas} | Erros: {erros}')
+    print(f'Estoque final: {quantidade_final} | Doações gravadas: {total_doacoes}')
+
+    ok = (
+        descartadas > 0
+        and sem_retry_after == 0
+        and aceitas <= args.estoque
+        and quantidade_final == args.estoque - aceitas
+        and total_doacoes == aceitas
+        and erros == 0
+    )
+    print('OK' if ok else 'FALHA: nenhuma requisição descartada, 503 sem Retry-After ou estoque inconsistente')
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=500)
+    parser.add_argument('--estoque', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--admissao', action='store_true',
+                        help='Também verifica o descarte (503) pelo controle de admissão')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///stress_doacoes.db')
+
+    print('--- Baixa de estoque (controle de admissão desligado) ---')
+    ok = verificar_estoque(criar_app(admissao=False), args)
+
+    if args.admissao:
+        print('--- Descarte pelo controle de admissão ---')
+        ok = verificar_admissao(criar_app(admissao=True), args) and ok
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
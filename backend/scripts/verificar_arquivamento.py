@@ -0,0 +1,89 @@
+"""Verifica a edição e a exclusão de doações que já foram para o arquivo.
+
+Cria um livro e duas doações, arquiva as duas com `arquivar_doacoes` e
+confere, pela API, que a doação arquivada pode ser editada, que a exclusão
+devolve o exemplar ao estoque e a tira do histórico e dos resumos, e que uma
+segunda exclusão responde 404.
+
+Uso:
+    DATABASE_URL=sqlite:///verificar_arquivamento.db python scripts/verificar_arquivamento.py
+
+Atenção: o script cria e remove tabelas no banco informado em DATABASE_URL.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import Admin, DoacaoArquivada, Livro, ResumoDoacoesDia  # noqa: E402
+from app.utils.arquivamento import arquivar_doacoes  # noqa: E402
+
+
+def main():
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///verificar_arquivamento.db')
+    os.environ.setdefault('EMAIL_WORKER_ENABLED', 'False')
+    app = create_app()
+    app.config['MAIL_SUPPRESS_SEND'] = True
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        admin = Admin(username='verificacao')
+        admin.set_password('verificacao')
+        livro = Livro(titulo='Livro Arquivado', autor='Teste', quantidade=5)
+        db.session.add_all([admin, livro])
+        db.session.commit()
+        livro_id = livro.id
+
+    token = client.post('/api/auth/login', json={'username': 'verificacao', 'password': 'verificacao'}).get_json()['token']
+    auth = {'Authorization': f'Bearer {token}'}
+
+    ids = []
+    for nome in ('Primeira', 'Segunda'):
+        response = client.post('/api/doacoes', json={
+            'nome': nome, 'email': f'{nome.lower()}@exemplo.com', 'tipo': 'livro',
+            'item': 'Livro Arquivado - Teste', 'livro_id': livro_id, 'lgpdConsent': True,
+        })
+        ids.append(response.get_json()['doacao']['id'])
+
+    with app.app_context():
+        arquivar_doacoes(datetime.utcnow() + timedelta(seconds=1))
+
+    falhas = []
+
+    def verificar(condicao, mensagem):
+        print(('OK    ' if condicao else 'FALHA ') + mensagem)
+        if not condicao:
+            falhas.append(mensagem)
+
+    editada, excluida = ids
+    response = client.put(f'/api/doacoes/{editada}', headers=auth, json={
+        'nome': 'Primeira (editada)', 'email': 'primeira@exemplo.com', 'tipo': 'livro', 'item': 'Livro Arquivado - Teste',
+    })
+    verificar(response.status_code == 200 and response.get_json()['doacao']['nome'] == 'Primeira (editada)',
+              'edição de doação arquivada')
+
+    response = client.delete(f'/api/doacoes/{excluida}', headers=auth)
+    verificar(response.status_code == 200, 'exclusão de doação arquivada')
+    verificar(client.delete(f'/api/doacoes/{excluida}', headers=auth).status_code == 404,
+              'segunda exclusão responde 404')
+
+    with app.app_context():
+        verificar(db.session.get(Livro, livro_id).quantidade == 4, 'exemplar devolvido ao estoque')
+        verificar(db.session.get(DoacaoArquivada, excluida).excluida_em is not None, 'doação marcada como excluída')
+        total = db.session.query(db.func.sum(ResumoDoacoesDia.total)).scalar()
+        verificar(total == 1, 'resumos diários sem a doação excluída')
+
+    historico = client.get('/api/doacoes?include_archived=1', headers=auth).get_json()
+    ids_historico = {d['id'] for d in historico.get('doacoes', [])}
+    verificar(editada in ids_historico and excluida not in ids_historico, 'histórico sem a doação excluída')
+
+    print('OK' if not falhas else f'FALHA: {len(falhas)} verificação(ões)')
+    return 0 if not falhas else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Verifica o envio da fila de emails contra um servidor SMTP local (aiosmtpd).
+
+Sobe um servidor SMTP em 127.0.0.1 que recusa o destinatário
+'recusado@exemplo.com' na primeira tentativa e confere que:
+
+- processar_lote envia os demais e agenda a nova tentativa com backoff;
+- o email recusado não é reenviado antes do backoff, e é enviado depois dele;
+- com o servidor fora do ar, a falha de conexão devolve o lote à fila e,
+  esgotadas as tentativas, o email fica como 'falhou';
+- email_worker.iniciar drena a fila no startup, sem um novo email enfileirado.
+
+Uso:
+    pip install aiosmtpd
+    DATABASE_URL=sqlite:///verificar_emails.db python scripts/verificar_emails_smtp.py
+
+Atenção: o script cria e remove tabelas no banco informado em DATABASE_URL.
+"""
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import FilaEmail  # noqa: E402
+from app.utils.email_queue import email_worker, enfileirar_email, processar_lote  # noqa: E402
+
+RECUSADO = 'recusado@exemplo.com'
+BACKOFF = 1
+
+
+class ServidorTeste:
+    """Guarda os destinatários recebidos; recusa RECUSADO só na primeira vez"""
+
+    def __init__(self):
+        self.recebidos = []
+        self.recusas = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == RECUSADO and not self.recusas:
+            self.recusas += 1
+            return '450 Caixa temporariamente indisponível'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recebidos.extend(envelope.rcpt_tos)
+        return '250 OK'
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///verificar_emails.db')
+    os.environ['EMAIL_WORKER_ENABLED'] = 'False'
+    porta = porta_livre()
+    app = create_app()
+    app.config.update(
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=porta, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+        MAIL_USERNAME=None, MAIL_PASSWORD=None, MAIL_SUPPRESS_SEND=False,
+        EMAIL_BACKOFF_BASE=BACKOFF, EMAIL_MAX_TENTATIVAS=2, EMAIL_POLL_INTERVAL=1,
+    )
+
+    handler = ServidorTeste()
+    servidor = Controller(handler, hostname='127.0.0.1', port=porta)
+    servidor.start()
+
+    falhas = []
+
+    def verificar(condicao, mensagem):
+        print(('OK    ' if condicao else 'FALHA ') + mensagem)
+        if not condicao:
+            falhas.append(mensagem)
+
+    def enfileirar(*destinatarios):
+        emails = [enfileirar_email(d, 'Obrigado!', '<p>Obrigado pela doação</p>') for d in destinatarios]
+        db.session.commit()
+        return [email.id for email in emails]
+
+    try:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            # 1) Lote com um destinatário recusado: os demais saem, o recusado volta com backoff
+            _, recusado, _ = enfileirar('a@exemplo.com', RECUSADO, 'b@exemplo.com')
+            enviados = processar_lote()
+            email = db.session.get(FilaEmail, recusado)
+            verificar(enviados == 2 and sorted(handler.recebidos) == ['a@exemplo.com', 'b@exemplo.com'],
+                      'lote envia os emails aceitos')
+            verificar(email.status == 'pendente' and email.tentativas == 1 and email.ultimo_erro,
+                      'recusa agenda nova tentativa')
+            verificar(email.proxima_tentativa_em > datetime.utcnow(), 'nova tentativa respeita o backoff')
+
+            # 2) Antes do backoff nada é reenviado; depois dele, o email sai
+            verificar(processar_lote() == 0, 'nada reenviado antes do backoff')
+            time.sleep(BACKOFF + 0.5)
+            verificar(processar_lote() == 1 and handler.recebidos.count(RECUSADO) == 1,
+                      'reenvio após o backoff')
+            verificar(db.session.get(FilaEmail, recusado).status == 'enviado', 'email marcado como enviado')
+
+            # 3) Servidor fora do ar: falha de conexão, nova tentativa e, esgotadas, 'falhou'
+            servidor.stop()
+            [sem_servidor] = enfileirar('c@exemplo.com')
+            verificar(processar_lote() == 0, 'falha de conexão não envia')
+            email = db.session.get(FilaEmail, sem_servidor)
+            verificar(email.status == 'pendente' and email.tentativas == 1, 'falha de conexão devolve à fila')
+            time.sleep(BACKOFF + 0.5)
+            processar_lote()
+            email = db.session.get(FilaEmail, sem_servidor)
+            verificar(email.status == 'falhou' and email.tentativas == 2, 'tentativas esgotadas marcam falhou')
+
+            # 4) Startup: o worker drena a fila sem esperar um novo email
+            servidor = Controller(handler, hostname='127.0.0.1', port=porta)
+            servidor.start()
+            [pendente] = enfileirar('d@exemplo.com')
+
+        app.config['EMAIL_WORKER_ENABLED'] = True
+        email_worker.iniciar(app)
+        limite = time.monotonic() + 10
+        while 'd@exemplo.com' not in handler.recebidos and time.monotonic() < limite:
+            time.sleep(0.1)
+        verificar('d@exemplo.com' in handler.recebidos, 'worker iniciado no startup drena a fila')
+        with app.app_context():
+            time.sleep(0.5)
+            verificar(db.session.get(FilaEmail, pendente).status == 'enviado', 'email do startup marcado como enviado')
+    finally:
+        servidor.stop()
+
+    print('OK' if not falhas else f'FALHA: {len(falhas)} verificação(ões)')
+    return 0 if not falhas else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""Ponto de entrada WSGI para produção.
+
+Uso:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Com GUNICORN_PRELOAD=true o app é criado e aquecido uma única vez no processo
+mestre; os workers herdam esse estado pelo fork.
+"""
+from app import create_app
+from app.utils.inicializacao import aquecer
+
+app = create_app()
+aquecer(app)
@@ -74,6 +74,12 @@ const ReportsTable = ({ relatorios, onEdit, onDelete }) => {
               </td>
               <td className="px-6 py-4 whitespace-nowrap">
                 <div className="text-sm text-gray-900">{relatorio.item}</div>
+                {relatorio.livro && (
+                  <div className="text-xs text-gray-500">
+                    {relatorio.livro.autor} · {relatorio.livro.quantidade} em
+                    estoque
+                  </div>
+                )}
               </td>
               <td className="px-6 py-4 whitespace-nowrap">
                 <div className="flex space-x-2">
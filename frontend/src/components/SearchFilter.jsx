@@ -1,6 +1,33 @@
+import { useEffect, useState } from "react";
 import { Search } from "lucide-react";
+import { sugerirLivros } from "../services/api";
 
 const SearchFilter = ({ searchTerm, setSearchTerm, resultsCount }) => {
+  const [sugestoes, setSugestoes] = useState([]);
+
+  // Sugestões do índice em memória do servidor, após uma pausa na digitação
+  useEffect(() => {
+    const termo = searchTerm.trim();
+    if (!termo) {
+      setSugestoes([]);
+      return;
+    }
+    let cancelado = false;
+    const timer = setTimeout(() => {
+      sugerirLivros(termo)
+        .then((dados) => {
+          if (!cancelado) setSugestoes(dados);
+        })
+        .catch(() => {
+          if (!cancelado) setSugestoes([]);
+        });
+    }, 150);
+    return () => {
+      cancelado = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
+
   return (
     <div className="mb-8">
       <div className="max-w-md mx-auto">
@@ -11,8 +38,17 @@ const SearchFilter = ({ searchTerm, setSearchTerm, resultsCount }) => {
             placeholder="Buscar por título ou autor..."
             value={searchTerm}
             onChange={(e) => setSearchTerm(e.target.value)}
+            list="sugestoes-livros"
+            autoComplete="off"
             className="w-full pl-10 pr-4 py-3 border border-gray-300 rounded-xl focus:ring-2 focus:ring-[#9B033E] focus:border-transparent outline-none transition-all"
           />
+          <datalist id="sugestoes-livros">
+            {sugestoes.map((livro) => (
+              <option key={livro.id} value={livro.titulo}>
+                {livro.autor}
+              </option>
+            ))}
+          </datalist>
         </div>
         {searchTerm && (
           <p className="text-center text-sm text-gray-800 mt-2">
@@ -1,9 +1,9 @@
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 import { RefreshCw, AlertCircle } from "lucide-react";
 import Header from "../components/Header";
 import BookTable from "../components/BookTable";
 import SearchFilter from "../components/SearchFilter";
-import { getLivros } from "../services/api";
+import { getLivros, assinarEventosLivros } from "../services/api";
 import { useNavigate } from "react-router-dom";
 
 const BookPage = ({ openModal }) => {
@@ -33,6 +33,37 @@ const BookPage = ({ openModal }) => {
     fetchLivros();
   }, [fetchLivros]);
 
+  // Mantém as quantidades atualizadas pelo stream de eventos do catálogo
+  const tempoRealRef = useRef(false);
+  const livrosRef = useRef(livros);
+  livrosRef.current = livros;
+  useEffect(() => {
+    const fechar = assinarEventosLivros({
+      onEstoque: (deltas) => {
+        // Livro novo: o stream não traz título e autor, então recarrega a lista
+        const ids = new Set(livrosRef.current.map((l) => l.id));
+        if (deltas.some((d) => !ids.has(d.id))) {
+          fetchLivros();
+          return;
+        }
+        const porId = new Map(deltas.map((d) => [d.id, d]));
+        setLivros((atuais) =>
+          atuais.map((l) => (porId.has(l.id) ? { ...l, ...porId.get(l.id) } : l))
+        );
+      },
+      onRemovido: (removidos) => {
+        const ids = new Set(removidos.map((r) => r.id));
+        setLivros((atuais) => atuais.filter((l) => !ids.has(l.id)));
+      },
+      onReset: fetchLivros,
+      // Só dispensa o recarregamento quando o stream vê as doações de todos os workers
+      onStatus: ({ entre_workers }) => {
+        tempoRealRef.current = entre_workers;
+      },
+    });
+    return () => fechar?.();
+  }, [fetchLivros]);
+
   const livrosOrdenados = [...livros].sort((a, b) => {
     if (a.quantidade === 0 && b.quantidade > 0) return 1;
     if (a.quantidade > 0 && b.quantidade === 0) return -1;
@@ -51,9 +82,9 @@ const BookPage = ({ openModal }) => {
     try {
       setUpdatingBook(livro.id);
 
-      // Cria um callback que sempre atualiza a lista, independente do resultado
+      // Sem o stream de eventos (ou com ele restrito a um worker), recarrega a lista quando o modal é fechado
       const alwaysUpdateCallback = () => {
-        fetchLivros(); // Sempre recarrega os livros quando o modal é fechado
+        if (!tempoRealRef.current) fetchLivros();
       };
 
       // Passa o callback que sempre executa
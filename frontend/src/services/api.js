@@ -21,12 +21,19 @@ const validarEmail = (email) => {
   return emailRegex.test(email);
 };
 
+// Momento da última escrita desta aba: enquanto recente, o servidor lê do
+// banco primário (e não da réplica) para mostrar o que acabou de ser gravado
+let ultimaEscrita = null;
+
 api.interceptors.request.use(
   (config) => {
     const token = localStorage.getItem("adminToken");
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    if (ultimaEscrita) {
+      config.headers["X-Last-Write"] = ultimaEscrita;
+    }
     return config;
   },
   (error) => {
@@ -34,9 +41,46 @@ api.interceptors.request.use(
   }
 );
 
+// Criações com Idempotency-Key podem ser reenviadas com segurança: o servidor
+// devolve a resposta guardada em vez de registrar a doação duas vezes
+const MAX_RETENTATIVAS = 3;
+
+const gerarChaveIdempotencia = () =>
+  typeof crypto !== "undefined" && crypto.randomUUID
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+const deveRetentar = (error) => {
+  const config = error.config;
+  if (!config?.headers?.["Idempotency-Key"]) return false;
+  if ((config.tentativas || 0) >= MAX_RETENTATIVAS) return false;
+  const status = error.response?.status;
+  // Sem resposta (conexão/timeout), erro do servidor, sobrecarga (503) ou a mesma chave ainda em andamento (409)
+  return !error.response || status >= 500 || status === 409;
+};
+
+const esperaRetentativa = (error, tentativa) => {
+  const retryAfter = Number(error.response?.headers?.["retry-after"]);
+  if (retryAfter > 0) return retryAfter * 1000;
+  return 500 * 2 ** (tentativa - 1) + Math.random() * 250;
+};
+
 api.interceptors.response.use(
-  (response) => response,
-  (error) => {
+  (response) => {
+    const escrita = response.headers?.["x-last-write"];
+    if (escrita) ultimaEscrita = escrita;
+    return response;
+  },
+  async (error) => {
+    if (deveRetentar(error)) {
+      const config = error.config;
+      config.tentativas = (config.tentativas || 0) + 1;
+      await new Promise((resolve) =>
+        setTimeout(resolve, esperaRetentativa(error, config.tentativas))
+      );
+      return api(config);
+    }
+
     console.error("Erro na API:", error.response?.data || error.message);
 
     if (error.response?.status === 401) {
@@ -101,6 +145,23 @@ export const getLivros = async () => {
   }
 };
 
+// Recebe as mudanças de estoque do catálogo por SSE, sem recarregar a lista.
+// onEstoque recebe [{ id, quantidade, updated_at }], onRemovido recebe [{ id }]
+// e onReset indica que a lista inteira deve ser recarregada. onStatus recebe
+// { entre_workers }: true só quando o stream traz as mudanças de todos os workers
+// (false também quando a conexão cai ou é recusada). Retorna a função que fecha a conexão.
+export const assinarEventosLivros = ({ onEstoque, onRemovido, onReset, onStatus }) => {
+  if (typeof EventSource === "undefined") return null;
+
+  const fonte = new EventSource(`${API_BASE}/livros/events`);
+  fonte.addEventListener("status", (e) => onStatus?.(JSON.parse(e.data)));
+  fonte.addEventListener("error", () => onStatus?.({ entre_workers: false }));
+  fonte.addEventListener("estoque", (e) => onEstoque?.(JSON.parse(e.data)));
+  fonte.addEventListener("removido", (e) => onRemovido?.(JSON.parse(e.data)));
+  fonte.addEventListener("reset", () => onReset?.());
+  return () => fonte.close();
+};
+
 export const getLivroPorId = async (id) => {
   try {
     const response = await api.get(`/livros/${id}`);
@@ -121,6 +182,18 @@ export const buscarLivros = async (termo) => {
   }
 };
 
+// Autocomplete: até `limite` livros {id, titulo, autor} para o termo digitado
+export const sugerirLivros = async (termo, limite = 8) => {
+  try {
+    const response = await api.get(
+      `/livros/suggest?q=${encodeURIComponent(termo)}&limit=${limite}`
+    );
+    return response.data.sugestoes;
+  } catch (error) {
+    throw new Error(`Erro ao buscar sugestões: ${error.message}`);
+  }
+};
+
 export const criarLivro = async (dados) => {
   try {
     if (!dados.titulo || !dados.autor) {
@@ -215,15 +288,19 @@ export const doarLivro = async ({
     }
 
     const item = `${titulo.trim()} - ${autor.trim()}`;
-    const response = await api.post("/doacoes", {
-      // <--- URL CORRETA: APENAS "/doacoes"
-      nome: nome.trim(),
-      email: email.trim(),
-      item,
-      tipo: "livro",
-      livro_id: livro_id,
-      lgpdConsent: lgpdConsent,
-    });
+    const response = await api.post(
+      "/doacoes",
+      {
+        // <--- URL CORRETA: APENAS "/doacoes"
+        nome: nome.trim(),
+        email: email.trim(),
+        item,
+        tipo: "livro",
+        livro_id: livro_id,
+        lgpdConsent: lgpdConsent,
+      },
+      { headers: { "Idempotency-Key": gerarChaveIdempotencia() } }
+    );
     return response.data;
   } catch (error) {
     throw new Error(`Erro ao registrar doação de livro: ${error.message}`);
@@ -243,14 +320,18 @@ export const doarJogo = async ({ nome, email, lgpdConsent }) => {
       throw new Error("Email inválido");
     }
 
-    const response = await api.post("/doacoes", {
-      // <--- URL CORRETA: APENAS "/doacoes"
-      nome: nome.trim(),
-      email: email.trim(),
-      item: "Jogo de tabuleiro",
-      tipo: "jogo",
-      lgpdConsent: lgpdConsent,
-    });
+    const response = await api.post(
+      "/doacoes",
+      {
+        // <--- URL CORRETA: APENAS "/doacoes"
+        nome: nome.trim(),
+        email: email.trim(),
+        item: "Jogo de tabuleiro",
+        tipo: "jogo",
+        lgpdConsent: lgpdConsent,
+      },
+      { headers: { "Idempotency-Key": gerarChaveIdempotencia() } }
+    );
     return response.data;
   } catch (error) {
     throw new Error(`Erro ao registrar doação de jogo: ${error.message}`);
@@ -259,7 +340,8 @@ export const doarJogo = async ({ nome, email, lgpdConsent }) => {
 
 export const listarDoacoes = async () => {
   try {
-    const response = await api.get("/doacoes");
+    // expand=livro: autor e estoque do livro vêm junto com cada doação
+    const response = await api.get("/doacoes?expand=livro");
     return response.data;
   } catch (error) {
     throw new Error(`Erro ao listar doações: ${error.message}`);